@@ -21,6 +21,95 @@ class Settings(BaseSettings):
     # ChromaDB
     chroma_persist_directory: str = "./data/chroma"
     
+    # Embeddings ("default" = Chroma's bundled all-MiniLM-L6-v2 ONNX model)
+    embedding_provider: str = "default"  # default | sentence-transformers
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: str = "torch"  # torch | onnx
+    embedding_quantize: bool = False  # int8 dynamic quantization (torch backend)
+    embedding_onnx_file: str = ""  # e.g. onnx/model_qint8_avx512.onnx
+    embedding_batch_size: int = 32
+    embedding_threads: int = 0  # Intra-op CPU threads, 0 = library default
+    embedding_warmup: bool = True  # Run one embedding at startup
+    
+    # Retrieval
+    hybrid_search: bool = False  # Fuse BM25 lexical ranking with vector ranking
+    rrf_k: int = 60  # Reciprocal-rank fusion damping constant
+    search_cache_size: int = 1024  # Max cached search results (0 disables)
+    search_cache_ttl: float = 300.0  # Seconds before a cached result expires
+    chunking_enabled: bool = False  # Search passage chunks instead of whole documents
+    chunk_size: int = 800  # Target characters per chunk
+    chunk_overlap: int = 100  # Characters shared by consecutive chunks
+    max_passages_per_document: int = 2  # Passages returned per parent document
+    rerank_enabled: bool = False  # Re-rank candidates with a local cross-encoder
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 30  # Candidates over-fetched for re-ranking
+    rerank_batch_size: int = 16
+    rerank_budget_ms: float = 200.0  # Fall back to vector order past this budget
+    mmr_enabled: bool = False  # Diversify results with maximal marginal relevance
+    mmr_lambda: float = 0.5  # 1.0 = pure relevance, 0.0 = pure diversity
+    mmr_candidates: int = 20  # Candidates over-fetched for MMR selection
+    
+    # Translation
+    translation_batching: bool = True  # Pack several documents per Gemini request
+    translation_batch_tokens: int = 6000  # Estimated source tokens per request
+    translation_batch_items: int = 10  # Max documents per request
+    translation_prewarm: bool = True  # Queue translations at ingest (reads queue their misses regardless)
+    prewarm_languages: str = "zh,en"  # Comma-separated target languages
+    prewarm_workers: int = 2  # Background translation threads
+    prewarm_jobs_per_minute: float = 30  # Rate limit shared by all workers
+    prewarm_batch_size: int = 5  # Jobs translated per request
+    prewarm_max_attempts: int = 3  # Attempts before a job is marked failed
+    
+    # LLM provider ("stub" and "replay" run offline, for load testing)
+    llm_provider: str = "gemini"  # gemini | stub | replay
+    llm_record_path: str = ""  # Append every real response to this JSONL fixture
+    llm_replay_path: str = ""  # Fixture answered from by the replay provider
+    llm_replay_latency: bool = True  # Sleep for the recorded latency on replay
+    llm_replay_fallback: bool = True  # Answer prompts missing from the fixture with the stub
+    llm_stub_latency_ms: float = 800  # Median time to first token
+    llm_stub_latency_sigma: float = 0.5  # Log-normal spread of the latency (0 = fixed)
+    llm_stub_tokens_per_second: float = 50  # Output rate after the first token
+    llm_stub_output_tokens: int = 200  # Length of stub answers
+    llm_stub_error_rate: float = 0.0  # Fraction of calls failing
+    llm_stub_rate_limit_rate: float = 0.0  # Fraction of calls rejected as 429
+    llm_stub_seed: int = 0
+    
+    # LLM gateway (shared by chat, translation and the collector)
+    llm_models: str = "gemini-2.0-flash,gemini-1.5-flash,gemini-1.5-pro"  # Fallback order
+    llm_requests_per_minute: float = 15  # 0 disables the limit
+    llm_tokens_per_minute: float = 1_000_000  # Estimated tokens; 0 disables the limit
+    llm_max_concurrency: int = 4  # Gemini calls in flight at once
+    llm_interactive_reserve: int = 1  # Slots kept free for chat
+    llm_interactive_rate_share: float = 0.2  # Share of the rate budgets kept free for chat
+    llm_max_retries: int = 3  # Attempts per model when rate limited
+    
+    # Conversations
+    chat_history_tokens: int = 2000  # Budget for history included in prompts
+    conversation_flush_interval: float = 0.5  # Seconds between batched message writes
+    conversation_batch_size: int = 100  # Buffered messages that trigger an early write
+    context_token_budget: int = 3000  # Estimated tokens of retrieved text per prompt
+    
+    # Chat answer cache
+    answer_cache_enabled: bool = True
+    answer_cache_size: int = 512  # Stored answers (LRU)
+    answer_cache_ttl: float = 3600  # Seconds
+    answer_cache_threshold: float = 0.92  # Min cosine similarity of query embeddings
+    
+    # Tracing
+    server_timing: bool = True  # Send per-request span timings in a Server-Timing header
+    slow_request_ms: float = 1000  # Requests slower than this are written to the slow log
+    slow_request_log: str = "./data/slow_requests.log"  # JSON lines with each slow request's span tree
+    
+    # Profiling (off unless a token or sample rate is set)
+    profiling_token: str = ""  # Requests with a matching X-Profile header are profiled
+    profiling_sample_rate: float = 0.0  # Fraction of all requests profiled
+    profiling_interval_ms: float = 5  # Stack sampling interval
+    profiling_max_files: int = 200  # Profiles kept under data_dir/profiles
+    
+    # Executor
+    rag_max_workers: int = 8  # Threads serving blocking ChromaDB calls
+    rag_max_queue: int = 256  # Queued calls before requests are rejected with 503
+    
     # Paths
     base_dir: Path = Path(__file__).parent.parent
     knowledge_base_dir: Path = base_dir / "knowledge_base"
@@ -0,0 +1,39 @@
+"""SQLite helpers for the application database (DATABASE_URL)."""
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.config import Settings, get_settings
+
+
+def get_db_path(settings: Optional[Settings] = None) -> Path:
+    """Resolve the SQLite file path from DATABASE_URL (sqlite:///path)."""
+    settings = settings or get_settings()
+    url = settings.database_url
+    prefix = "sqlite:///"
+    if not url.startswith(prefix):
+        raise ValueError(f"Only sqlite:/// database URLs are supported, got: {url}")
+    return Path(url[len(prefix):])
+
+
+@contextmanager
+def connect(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    """Open a connection, commit on success and always close it.
+
+    Connections are cheap in SQLite, so callers open one per unit of work
+    instead of sharing a connection across threads.
+    """
+    path = path or get_db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
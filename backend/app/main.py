@@ -1,10 +1,22 @@
 """FastAPI application entry point."""
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings, init_directories
-from app.routers import knowledge, chat, collector
+from app.routers import knowledge, chat, collector, metrics
+from app.services.conversations import get_conversation_store
+from app.services.embeddings import EmbeddingMismatchError
+from app.services.llm_providers import llm_configured
+from app.services.metrics import REQUEST_LATENCY
+from app.services.profiling import get_request_profiler
+from app.services.tracing import get_slow_request_log, start_trace
+from app.services.rag_async import RAGOverloadedError, shutdown_async_rag_service
+from app.services.translation_queue import get_translation_worker
 
 # Initialize directories
 init_directories()
@@ -21,6 +33,8 @@ async def lifespan(app: FastAPI):
         from app.services.knowledge_loader import get_knowledge_loader
         
         rag = get_rag_service()
+        if settings.embedding_warmup:
+            rag.warm_up()
         stats = rag.get_stats()
         
         if stats["total_documents"] == 0:
@@ -31,12 +45,36 @@ async def lifespan(app: FastAPI):
                 print(f"Loaded {count} items from {filename}")
         else:
             print(f"Knowledge base already contains {stats['total_documents']} documents.")
+        
+        # Recount categories if documents were written outside this service
+        counted = rag.ensure_counters()
+        if counted:
+            print(f"Rebuilt category counters for {counted} documents.")
+        
+        # Backfill passage chunks for documents stored before chunking was enabled
+        chunk_count = rag.ensure_chunks()
+        if chunk_count:
+            print(f"Built {chunk_count} passage chunks.")
+        
+        # Drain queued translations in the background (ingest pre-warm and
+        # translations requested by read paths)
+        if llm_configured(settings):
+            get_translation_worker().start()
+            print(f"Translation pre-warming started: {rag.translation_queue.stats()['pending']} jobs pending.")
             
+    except EmbeddingMismatchError:
+        # Serving queries against vectors of another model gives wrong results
+        raise
     except Exception as e:
         print(f"Warning: Failed to initialize knowledge base: {e}")
         
     yield
-    # Shutdown events if any
+    
+    # Shutdown: let in-flight knowledge base calls and translations finish,
+    # then commit buffered chat messages
+    get_translation_worker().stop()
+    shutdown_async_rag_service()
+    get_conversation_store().stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -55,12 +93,84 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Trace the request, record its latency per route template and report span timings.
+    
+    Streamed bodies are still being sent when this returns, so for them
+    the trace covers the time to response headers.
+    """
+    status = 500
+    with start_trace("request") as trace:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if settings.server_timing:
+                response.headers["Server-Timing"] = trace.server_timing()
+                # Let the cross-origin frontend read it (Resource Timing API)
+                response.headers["Timing-Allow-Origin"] = "*"
+            return response
+        finally:
+            trace.root.finish()
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.observe(
+                trace.root.duration,
+                method=request.method,
+                route=route,
+                status=str(status),
+            )
+            get_slow_request_log().maybe_write(
+                trace,
+                method=request.method,
+                route=route,
+                path=request.url.path,
+                query=request.url.query,
+                status=status,
+            )
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Profile requests selected by the admin X-Profile token or the sample rate.
+    
+    The profile id is returned in an X-Profile-Id header; the collapsed
+    stacks are stored as data_dir/profiles/<id>.folded.
+    """
+    profiler = get_request_profiler()
+    if not profiler.enabled or not profiler.wanted(request.headers.get("X-Profile")):
+        return await call_next(request)
+    
+    sampler = profiler.start()
+    if sampler is None:
+        # Another request is being profiled
+        return await call_next(request)
+    
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        # Writing and pruning profile files is disk I/O: keep it off the event loop
+        profile_id = await run_in_threadpool(
+            profiler.finish, sampler, request.method, request.url.path, time.perf_counter() - start
+        )
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+@app.exception_handler(RAGOverloadedError)
+async def rag_overloaded_handler(request: Request, exc: RAGOverloadedError):
+    """Shed load when the knowledge base executor queue is full."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
 # Include routers
 app.include_router(knowledge.router, prefix="/api/knowledge", tags=["Knowledge"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
 app.include_router(collector.router, prefix="/api/collector", tags=["Collector"])
+app.include_router(metrics.router, tags=["Metrics"])
 
 
 @app.get("/")
@@ -1,10 +1,15 @@
 """Chat and Q&A API using RAG."""
 from fastapi import APIRouter, HTTPException
-from typing import Optional, List
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Dict, Any, Tuple
 from pydantic import BaseModel
 from datetime import datetime
+import json
 
-router = APIRouter()
+from app.routers.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
 
 
 class ChatMessage(BaseModel):
@@ -46,51 +51,106 @@ class SuggestedQuestion(BaseModel):
     category: str
 
 
-@router.post("/send", response_model=ChatResponse)
-async def send_message(request: ChatRequest):
-    """Send a message and get AI response based on knowledge base."""
-    import uuid
-    import google.generativeai as genai
-    from app.services.rag import get_rag_service
-    from app.config import get_settings
+SYSTEM_PROMPT = """你是一个专业的健康顾问 AI，基于权威医疗健康和运动科学资料来回答用户问题。
+
+规则：
+1. 只基于提供的参考资料回答问题
+2. 如果资料不足以回答问题，诚实说明
+3. 使用清晰、易懂的语言
+4. 适当引用来源（如"根据 WHO 指南..."）
+5. 对于医疗建议，始终建议咨询专业医生
+
+参考资料：
+{context}
+
+{history}用户问题：{question}
+
+请根据以上资料回答用户的问题："""
+
+NOT_CONFIGURED_MESSAGE = "抱歉，AI 服务尚未配置。请联系管理员设置 GEMINI_API_KEY。"
+
+
+async def _load_history(request: ChatRequest, conversation_id: str) -> List[Dict[str, Any]]:
+    """Get the conversation history for the prompt, bounded by a token budget.
     
-    settings = get_settings()
-    conversation_id = request.conversation_id or str(uuid.uuid4())
+    History sent by the client takes precedence (older clients still send
+    it); otherwise it is read from the conversation store.
+    """
+    from app.config import get_settings
+    from app.services.conversations import get_conversation_store, trim_to_budget
     
-    # Check if Gemini API is configured
-    if not settings.gemini_api_key:
-        return ChatResponse(
-            conversation_id=conversation_id,
-            message=ChatMessage(
-                role="assistant",
-                content="抱歉，AI 服务尚未配置。请联系管理员设置 GEMINI_API_KEY。",
-                timestamp=datetime.now(),
-            ),
-            sources=[],
-            confidence="low",
+    budget = get_settings().chat_history_tokens
+    if request.history:
+        return trim_to_budget(
+            [{"role": msg.role, "content": msg.content} for msg in request.history], budget
         )
+    if not request.conversation_id:
+        return []
+    return await run_in_threadpool(get_conversation_store().get_history, conversation_id, budget)
+
+
+def _record_exchange(conversation_id: str, question: str, answer: str):
+    """Append a question and its answer to the conversation store (buffered)."""
+    from app.services.conversations import get_conversation_store
     
-    # Configure Gemini
-    genai.configure(api_key=settings.gemini_api_key)
+    store = get_conversation_store()
+    store.append(conversation_id, "user", question)
+    store.append(conversation_id, "assistant", answer)
+
+
+def _build_prompt(question: str, history: List[Dict[str, Any]], search_results: List[Dict[str, Any]]) -> str:
+    """Build the answer prompt from packed search results and history."""
+    from app.services.context_packer import get_context_packer
     
-    # Get RAG service and search for relevant documents
-    rag = get_rag_service()
-    search_results = rag.search(request.message, n_results=5)
+    # Fit document text into the prompt budget; sources still list every result
+    packed = get_context_packer().pack(question, search_results)
     
     # Build context from search results
     context_parts = []
+    for i, result in enumerate(packed["documents"]):
+        metadata = result.get("metadata", {})
+        title = metadata.get("title", "Unknown")
+        source = metadata.get("source", "Unknown")
+        context_parts.append(f"[Document {i+1}] {title}\nSource: {source}\n{result['content']}\n")
+    
+    context_text = "\n---\n".join(context_parts) if context_parts else "No relevant documents found."
+    
+    # Build conversation history for context
+    history_text = ""
+    for msg in history:
+        role_label = "User" if msg["role"] == "user" else "Assistant"
+        history_text += f"{role_label}: {msg['content']}\n"
+    
+    return SYSTEM_PROMPT.format(
+        context=context_text,
+        history=f"对话历史：\n{history_text}\n" if history_text else "",
+        question=question,
+    )
+
+
+async def _retrieve(
+    request: ChatRequest,
+    query_embedding: Optional[List[float]] = None,
+) -> Tuple[List[Dict[str, Any]], List[SourceReference]]:
+    """Search the knowledge base for the question.
+    
+    Returns:
+        (search results, source references)
+    """
+    from app.services.rag_async import get_async_rag_service
+    
+    # Get RAG service and search for relevant documents
+    rag = get_async_rag_service()
+    search_results = await rag.asearch(request.message, n_results=5, query_embedding=query_embedding)
+    
     sources = []
-    for i, result in enumerate(search_results):
+    for result in search_results:
         metadata = result.get("metadata", {})
-        content = result.get("content", "")
         title = metadata.get("title", "Unknown")
         source = metadata.get("source", "Unknown")
         tier = metadata.get("tier", 4)
         url = metadata.get("source_url")
         relevance = result.get("relevance_score", 0)
-        
-        context_parts.append(f"[Document {i+1}] {title}\nSource: {source}\n{content}\n")
-        
         sources.append(SourceReference(
             title=title,
             source=source,
@@ -98,82 +158,105 @@ async def send_message(request: ChatRequest):
             tier=tier,
             relevance_score=relevance,
         ))
+    return search_results, sources
+
+
+async def _retrieve_and_build_prompt(
+    request: ChatRequest,
+    history: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[SourceReference], str]:
+    """Search the knowledge base and build the answer prompt.
     
-    context_text = "\n---\n".join(context_parts) if context_parts else "No relevant documents found."
+    Returns:
+        (search results, source references, prompt)
+    """
+    from app.services.metrics import stage
     
-    # Build conversation history for context
-    history_text = ""
-    if request.history:
-        for msg in request.history[-6:]:  # Last 6 messages for context
-            role_label = "User" if msg.role == "user" else "Assistant"
-            history_text += f"{role_label}: {msg.content}\n"
-    
-    # Construct the prompt
-    system_prompt = """你是一个专业的健康顾问 AI，基于权威医疗健康和运动科学资料来回答用户问题。
-
-规则：
-1. 只基于提供的参考资料回答问题
-2. 如果资料不足以回答问题，诚实说明
-3. 使用清晰、易懂的语言
-4. 适当引用来源（如"根据 WHO 指南..."）
-5. 对于医疗建议，始终建议咨询专业医生
+    search_results, sources = await _retrieve(request)
+    with stage("prompt_build"):
+        prompt = _build_prompt(request.message, history, search_results)
+    return search_results, sources, prompt
 
-参考资料：
-{context}
 
-{history}用户问题：{question}
+def _confidence(search_results: List[Dict[str, Any]]) -> str:
+    """Determine confidence based on search results (re-rank scores when present)."""
+    from app.services.rerank import result_score
+    
+    top = result_score(search_results[0]) if search_results else 0.0
+    if len(search_results) >= 3 and top > 0.7:
+        return "high"
+    if len(search_results) >= 1 and top > 0.5:
+        return "medium"
+    return "low"
 
-请根据以上资料回答用户的问题："""
 
-    prompt = system_prompt.format(
-        context=context_text,
-        history=f"对话历史：\n{history_text}\n" if history_text else "",
-        question=request.message,
-    )
+@router.post("/send", response_model=ChatResponse)
+async def send_message(request: ChatRequest):
+    """Send a message and get AI response based on knowledge base."""
+    import uuid
+    from app.services.answer_cache import get_answer_cache, source_signature
+    from app.services.llm_gateway import Priority, get_llm_gateway
+    from app.services.llm_providers import llm_configured
+    from app.services.metrics import stage
+    from app.services.rag_async import get_async_rag_service
+    from app.config import get_settings
+    
+    settings = get_settings()
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    
+    # Check if an LLM provider is configured
+    if not llm_configured(settings):
+        return ChatResponse(
+            conversation_id=conversation_id,
+            message=ChatMessage(
+                role="assistant",
+                content=NOT_CONFIGURED_MESSAGE,
+                timestamp=datetime.now(),
+            ),
+            sources=[],
+            confidence="low",
+        )
+    
+    history = await _load_history(request, conversation_id)
+    
+    # Paraphrases of an answered question reuse its answer; follow-ups
+    # depend on the conversation, so only history-free questions qualify
+    use_cache = settings.answer_cache_enabled and not history
+    query_embedding = None
+    if use_cache:
+        query_embedding = (await get_async_rag_service().aembed_texts([request.message]))[0]
+    
+    search_results, sources = await _retrieve(request, query_embedding)
+    
+    # Checked before packing and prompt building, which a hit does not need
+    if use_cache:
+        signature = source_signature(search_results)
+        cached = get_answer_cache().get(query_embedding, signature)
+        if cached is not None:
+            _record_exchange(conversation_id, request.message, cached["content"])
+            return ChatResponse(
+                conversation_id=conversation_id,
+                message=ChatMessage(
+                    role="assistant",
+                    content=cached["content"],
+                    timestamp=datetime.now(),
+                ),
+                sources=sources[:3],
+                confidence=cached["confidence"],
+            )
+    
+    with stage("prompt_build"):
+        prompt = _build_prompt(request.message, history, search_results)
     
-    async def generate_content_with_retry(prompt: str, retries: int = 3, initial_delay: float = 1.0):
-        import asyncio
-        import random
-        from google.api_core import exceptions
-        
-        # List of models to try in order
-        models = ["gemini-2.0-flash", "gemini-1.5-flash", "gemini-1.5-pro"]
-        
-        for model_name in models:
-            current_try = 0
-            model = genai.GenerativeModel(model_name)
-            
-            while current_try < retries:
-                try:
-                    # Use async generation if available, otherwise wrap sync call
-                    response = await model.generate_content_async(prompt)
-                    return response.text if response.text else "无法生成回答。"
-                except exceptions.ResourceExhausted:
-                    wait_time = (initial_delay * (2 ** current_try)) + random.uniform(0, 1)
-                    print(f"Rate limited on {model_name}. Retrying in {wait_time:.2f}s...")
-                    await asyncio.sleep(wait_time)
-                    current_try += 1
-                except Exception as e:
-                    # If it's not a rate limit error, try the next model or fail
-                    print(f"Error with {model_name}: {str(e)}")
-                    break # Break inner loop to try next model
-            
-            # If we exhausted retries for this model, continue to next model
-            continue
-            
-        raise Exception("所有可用模型均忙碌，请稍后重试。")
-
     try:
-        # Call Gemini API with retry logic
-        answer = await generate_content_with_retry(prompt)
+        # Shared gateway: rate limits, retries and model fallback
+        answer = await get_llm_gateway().agenerate(prompt, priority=Priority.INTERACTIVE)
+        answer = answer or "无法生成回答。"
+        confidence = _confidence(search_results)
         
-        # Determine confidence based on search results
-        if len(search_results) >= 3 and sources[0].relevance_score > 0.7:
-            confidence = "high"
-        elif len(search_results) >= 1 and sources[0].relevance_score > 0.5:
-            confidence = "medium"
-        else:
-            confidence = "low"
+        if use_cache:
+            get_answer_cache().set(query_embedding, signature, {"content": answer, "confidence": confidence})
+        _record_exchange(conversation_id, request.message, answer)
         
         return ChatResponse(
             conversation_id=conversation_id,
@@ -199,6 +282,68 @@ async def send_message(request: ChatRequest):
         )
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stream")
+async def stream_message(request: ChatRequest):
+    """Send a message and stream the answer as Server-Sent Events.
+    
+    Events, in order: "sources" (conversation id and top sources), any
+    number of "token" chunks, then "done" with the confidence. If every
+    model fails before the first token, an "error" event precedes "done".
+    Retrieval runs before the response starts, so its errors (e.g. an
+    overloaded knowledge base) still get a proper HTTP status.
+    """
+    import uuid
+    from app.services.llm_gateway import Priority, get_llm_gateway
+    from app.services.llm_providers import llm_configured
+    from app.config import get_settings
+    
+    settings = get_settings()
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    
+    configured = llm_configured(settings)
+    if configured:
+        history = await _load_history(request, conversation_id)
+        search_results, sources, prompt = await _retrieve_and_build_prompt(request, history)
+    
+    async def events():
+        if not configured:
+            yield _sse("sources", {"conversation_id": conversation_id, "sources": []})
+            yield _sse("token", {"text": NOT_CONFIGURED_MESSAGE})
+            yield _sse("done", {"confidence": "low"})
+            return
+        
+        yield _sse("sources", {
+            "conversation_id": conversation_id,
+            "sources": [source.model_dump() for source in sources[:3]],
+        })
+        
+        parts = []
+        try:
+            # Model fallback happens before the first token is sent
+            async for text in get_llm_gateway().astream(prompt, priority=Priority.INTERACTIVE):
+                if text:
+                    parts.append(text)
+                    yield _sse("token", {"text": text})
+        except Exception as e:
+            yield _sse("error", {"detail": f"抱歉，处理请求时出错：{str(e)}"})
+            yield _sse("done", {"confidence": "low"})
+            return
+        
+        _record_exchange(conversation_id, request.message, "".join(parts))
+        yield _sse("done", {"confidence": _confidence(search_results)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/suggestions", response_model=List[SuggestedQuestion])
 async def get_suggested_questions():
     """Get suggested questions for the chat interface."""
@@ -215,15 +360,26 @@ async def get_suggested_questions():
 @router.get("/history/{conversation_id}")
 async def get_conversation_history(conversation_id: str):
     """Get conversation history by ID."""
-    # TODO: Implement conversation storage
+    from app.services.conversations import get_conversation_store
+    
+    messages = await run_in_threadpool(get_conversation_store().get_messages, conversation_id)
     return {
         "conversation_id": conversation_id,
-        "messages": [],
+        "messages": [
+            ChatMessage(
+                role=msg["role"],
+                content=msg["content"],
+                timestamp=datetime.fromtimestamp(msg["created_at"]),
+            )
+            for msg in messages
+        ],
     }
 
 
 @router.delete("/history/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation."""
-    # TODO: Implement conversation deletion
+    from app.services.conversations import get_conversation_store
+    
+    await run_in_threadpool(get_conversation_store().delete, conversation_id)
     return {"status": "deleted", "conversation_id": conversation_id}
@@ -2,10 +2,11 @@ from fastapi import APIRouter, Query, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
+from app.routers.tracing import TracedRoute
 from app.services.collector import get_collector_service
-from app.services.rag import get_rag_service
+from app.services.rag_async import get_async_rag_service
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 class SearchResult(BaseModel):
     title: str
@@ -50,7 +51,7 @@ async def preview_content(request: PreviewRequest):
 @router.post("/import")
 async def import_content(request: ImportRequest):
     """Save content to knowledge base."""
-    rag = get_rag_service()
+    rag = get_async_rag_service()
     
     # Construct metadata
     metadata = {
@@ -59,12 +60,11 @@ async def import_content(request: ImportRequest):
         "source_url": request.url,
         "category": request.category,
         "tier": request.tier,
-        # Auto-create translated titles since we forced Chinese output
-        "title_zh": request.title, 
-        "content_zh": request.content
+        # Content is already Chinese (forced by the cleaning prompt)
+        "language": "zh",
     }
     
     # Save to RAG
-    doc_id = rag.add_document(request.content, metadata)
+    doc_id = await rag.aadd_document(request.content, metadata)
     
     return {"id": doc_id, "status": "success"}
@@ -1,11 +1,16 @@
 """Knowledge base browsing and search API."""
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.services.rag import get_rag_service
+from app.routers.tracing import TracedRoute
+from app.services.answer_cache import get_answer_cache
+from app.services.context_packer import get_context_packer
+from app.services.llm_gateway import get_llm_gateway
+from app.services.rag_async import get_async_rag_service
+from app.services.translation_queue import get_translation_worker
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 class KnowledgeItem(BaseModel):
@@ -27,6 +32,20 @@ class KnowledgeListResponse(BaseModel):
     page_size: int
 
 
+class BatchSearchQuery(BaseModel):
+    """A single query in a batch search request."""
+    q: str = Field(..., min_length=1)
+    category: Optional[str] = None
+    tier: Optional[int] = Field(None, ge=1, le=4)
+
+
+class BatchSearchRequest(BaseModel):
+    """Batch search request model."""
+    queries: List[BatchSearchQuery] = Field(..., min_length=1, max_length=200)
+    limit: int = Field(10, ge=1, le=50)
+    lang: str = "zh"
+
+
 class CategoryInfo(BaseModel):
     """Category information."""
     id: str
@@ -38,8 +57,8 @@ class CategoryInfo(BaseModel):
 @router.get("/categories", response_model=List[CategoryInfo])
 async def get_categories(lang: str = Query("zh", description="Language code (en/zh)")):
     """Get all knowledge categories."""
-    rag = get_rag_service()
-    counts = rag.get_category_counts()
+    rag = get_async_rag_service()
+    counts = await rag.aget_category_counts()
     
     # Localize names based on lang
     is_en = lang == "en"
@@ -63,60 +82,27 @@ async def browse_knowledge(
     lang: str = Query("zh", description="Language code"),
 ):
     """Browse knowledge base with optional filters."""
-    rag = get_rag_service()
-    
-    # Get items by category
-    if category:
-        items = rag.get_all_by_category(category, limit=page_size * page)
-    else:
-        # Get all items - use a large query to get everything
-        items = rag.collection.get(limit=page_size * page, include=["documents", "metadatas"])
-        # Convert to expected format
-        formatted_items = []
-        if items["documents"]:
-            for i, doc in enumerate(items["documents"]):
-                formatted_items.append({
-                    "id": items["ids"][i],
-                    "content": doc,
-                    "metadata": items["metadatas"][i] if items["metadatas"] else {},
-                })
-        items = formatted_items
+    rag = get_async_rag_service()
     
-    # Filter by tier if specified
-    if tier:
-        items = [item for item in items if item.get("metadata", {}).get("tier") == tier]
+    page_data = await rag.abrowse(category=category, tier=tier, page=page, page_size=page_size)
+    total = page_data["total"]
+    paginated_items = page_data["items"]
     
-    # Pagination
-    total = len(items)
-    start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
-    paginated_items = items[start_idx:end_idx]
-    
-    # Batch translate items if needed
-    if lang in ['zh', 'en']:
-        paginated_items = rag.batch_ensure_translations(paginated_items, lang)
+    # Use stored translations (never blocks on the LLM); misses are queued
+    # for the background worker and shown in the original language meanwhile
+    paginated_items = await rag.aapply_cached_translations(paginated_items, lang, request_missing=True)
 
     # Convert to response format
     knowledge_items = []
     for item in paginated_items:
         metadata = item.get("metadata", {})
         
-        # Determine title and content based on available metadata (batch translation handles updates)
-        content = item.get("content", "")
-        title = metadata.get("title", "Untitled")
-        
-        # Try to use translated fields if available (batch_ensure_translations updates metadata)
-        if lang in ['zh', 'en']:
-             cached_title = metadata.get(f"title_{lang}")
-             cached_content = metadata.get(f"content_{lang}")
-             if cached_title: title = cached_title
-             if cached_content: content = cached_content
-
+        # apply_cached_translations already swapped in translated title/content
         knowledge_items.append(
             KnowledgeItem(
                 id=item.get("id", ""),
-                title=title,
-                content=content,
+                title=metadata.get("title", "Untitled"),
+                content=item.get("content", ""),
                 category=metadata.get("category", ""),
                 source=metadata.get("source", "Unknown"),
                 source_url=metadata.get("source_url"),
@@ -140,17 +126,12 @@ async def search_knowledge(
     lang: str = Query("zh", description="Language code"),
 ):
     """Search knowledge base using semantic search."""
-    rag = get_rag_service()
-    results = rag.search(q, n_results=limit, category=category)
+    rag = get_async_rag_service()
+    results = await rag.asearch(q, n_results=limit, category=category)
     
-    # Attempt to use cached translation if available
-    for res in results:
-        meta = res.get("metadata", {})
-        if lang in ['zh', 'en']:
-             cached_content = meta.get(f"content_{lang}")
-             if cached_content:
-                 res["content"] = cached_content
-                 
+    # Use stored translations where available (never blocks on the LLM)
+    results = await rag.aapply_cached_translations(results, lang)
+
     return {
         "query": q,
         "results": results,
@@ -158,11 +139,47 @@ async def search_knowledge(
     }
 
 
+@router.post("/search/batch")
+async def search_knowledge_batch(request: BatchSearchRequest):
+    """Run several semantic searches with one batched embedding/query pass."""
+    rag = get_async_rag_service()
+    batch_results = await rag.asearch_many(
+        [{"query": item.q, "category": item.category, "tier": item.tier} for item in request.queries],
+        n_results=request.limit,
+    )
+    
+    responses = []
+    for item, results in zip(request.queries, batch_results):
+        # Use stored translations where available (never blocks on the LLM)
+        results = await rag.aapply_cached_translations(results, request.lang)
+        
+        responses.append({
+            "query": item.q,
+            "results": results,
+            "total": len(results),
+        })
+    
+    return {"results": responses}
+
+
+@router.get("/stats")
+async def get_knowledge_stats():
+    """Get knowledge base, search cache and executor statistics."""
+    rag = get_async_rag_service()
+    stats = await rag.aget_stats()
+    stats["executor"] = rag.stats()
+    stats["translation_worker"] = get_translation_worker().stats()
+    stats["llm_gateway"] = get_llm_gateway().stats()
+    stats["answer_cache"] = get_answer_cache().stats()
+    stats["context_packer"] = get_context_packer().stats()
+    return stats
+
+
 @router.get("/{item_id}", response_model=KnowledgeItem)
 async def get_knowledge_item(item_id: str, lang: str = Query("zh")):
     """Get a specific knowledge item by ID."""
-    rag = get_rag_service()
-    item = rag.get_document(item_id, lang=lang)
+    rag = get_async_rag_service()
+    item = await rag.aget_document(item_id, lang=lang)
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -0,0 +1,105 @@
+"""Prometheus metrics endpoint."""
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.answer_cache import get_answer_cache
+from app.services.conversations import get_conversation_store
+from app.services.llm_gateway import get_llm_gateway
+from app.services.metrics import render_histograms, render_samples
+from app.services.rag_async import get_async_rag_service
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _samples(values: Dict[str, float], label: str) -> List[Tuple[Dict[str, str], float]]:
+    return [({label: key}, value) for key, value in sorted(values.items())]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose latency histograms and component counters in Prometheus text format."""
+    rag = get_async_rag_service()
+    stats = await rag.aget_stats()
+    executor = rag.stats()
+    gateway = get_llm_gateway().stats()
+    answer_cache = get_answer_cache().stats()
+
+    lines = render_histograms()
+
+    # Collection size
+    lines += render_samples("knowledge_documents", "Documents in the knowledge collection.", "gauge", [
+        ({"collection": "documents"}, stats["total_documents"]),
+        ({"collection": "chunks"}, stats["total_chunks"]),
+    ])
+    lines += render_samples(
+        "knowledge_translations", "Stored translations by language.", "gauge",
+        _samples(stats["translations"], "lang"),
+    )
+
+    # Caches
+    search_cache = stats["search_cache"]
+    caches = {
+        "search": (search_cache["hits"], search_cache["misses"], search_cache["size"]),
+        "answer": (answer_cache["hits"], answer_cache["misses"], answer_cache["size"]),
+    }
+    lines += render_samples("cache_hits_total", "Cache hits.", "counter", [
+        ({"cache": name}, hits) for name, (hits, _, _) in caches.items()
+    ])
+    lines += render_samples("cache_misses_total", "Cache misses.", "counter", [
+        ({"cache": name}, misses) for name, (_, misses, _) in caches.items()
+    ])
+    lines += render_samples("cache_hit_ratio", "Hits over lookups since start.", "gauge", [
+        ({"cache": name}, hits / (hits + misses) if hits + misses else 0.0)
+        for name, (hits, misses, _) in caches.items()
+    ])
+    lines += render_samples("cache_entries", "Entries held per cache.", "gauge", [
+        ({"cache": name}, size) for name, (_, _, size) in caches.items()
+    ])
+    flights = stats["translation_flights"]
+    lines += render_samples("translation_singleflight_total", "Translations run (led) or joined (shared).", "counter", [
+        ({"role": "led"}, flights["led"]),
+        ({"role": "shared"}, flights["shared"]),
+    ])
+
+    # Queues
+    lines += render_samples("rag_executor_calls", "Knowledge base executor calls by state.", "gauge", [
+        ({"state": "queued"}, executor["queued"]),
+        ({"state": "running"}, executor["running"]),
+    ])
+    lines += render_samples("rag_executor_calls_total", "Finished knowledge base executor calls.", "counter", [
+        ({"outcome": "completed"}, executor["completed"]),
+        ({"outcome": "failed"}, executor["failed"]),
+        ({"outcome": "rejected"}, executor["rejected"]),
+    ])
+    lines += render_samples("llm_in_flight", "LLM calls in flight.", "gauge", [({}, gateway["in_flight"])])
+    lines += render_samples("llm_queued", "LLM calls waiting for admission by priority.", "gauge", [
+        ({"priority": name}, priority["queued"]) for name, priority in gateway["priorities"].items()
+    ])
+    lines += render_samples(
+        "translation_jobs", "Pre-warm translation jobs by status.", "gauge",
+        _samples(stats["translation_queue"], "status"),
+    )
+    lines += render_samples(
+        "conversation_pending_messages", "Chat messages buffered for writing.", "gauge",
+        [({}, get_conversation_store().stats()["pending"])],
+    )
+
+    # LLM retries and fallbacks
+    lines += render_samples("llm_requests_total", "Admitted LLM calls by priority.", "counter", [
+        ({"priority": name}, priority["requests"]) for name, priority in gateway["priorities"].items()
+    ])
+    lines += render_samples(
+        "llm_retries_total", "Rate-limited LLM calls retried, by model.", "counter",
+        _samples(gateway["retries"], "model"),
+    )
+    lines += render_samples(
+        "llm_fallbacks_total", "Requests answered by a fallback model, by that model.", "counter",
+        _samples(gateway["fallbacks_by_model"], "model"),
+    )
+    lines += render_samples("llm_failures_total", "Requests every model failed.", "counter", [({}, gateway["failures"])])
+
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=CONTENT_TYPE)
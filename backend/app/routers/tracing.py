@@ -0,0 +1,45 @@
+"""Route class that traces endpoints and response serialization."""
+import functools
+import inspect
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+from app.services.tracing import current_span, span
+
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an async endpoint in an "endpoint" span (FastAPI reads the wrapped signature)."""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def traced(*args, **kwargs):
+        with span("endpoint"):
+            return await endpoint(*args, **kwargs)
+
+    return traced
+
+
+class TracedRoute(APIRoute):
+    """APIRoute recording an "endpoint" span and a "serialize" span after it.
+
+    "serialize" runs from the endpoint's return until the response object
+    is built: response-model validation and JSON encoding.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _traced_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            response = await handler(request)
+            root = current_span()
+            endpoint = root.find("endpoint") if root is not None else None
+            if endpoint is not None and endpoint.end is not None:
+                root.child("serialize", start=endpoint.end).finish()
+            return response
+
+        return traced_handler
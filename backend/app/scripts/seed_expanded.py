@@ -169,6 +169,19 @@ def seed_expanded_data():
 
     print(f"📦 Prepared {len(knowledge_items)} items for ingestion.")
     
+    # Earlier versions of this script stored the items as seed_exp_<index>;
+    # skip those, since add_documents would store them again under new ids
+    legacy_ids = [f"seed_exp_{i}" for i in range(len(knowledge_items))]
+    seeded = set(rag.collection.get(ids=legacy_ids, include=[])["ids"])
+    knowledge_items = [
+        item for legacy_id, item in zip(legacy_ids, knowledge_items) if legacy_id not in seeded
+    ]
+    if seeded:
+        print(f"⏭️  Skipping {len(seeded)} items already seeded under seed_exp_* ids.")
+    if not knowledge_items:
+        print("✅ Nothing to add.")
+        return
+    
     # Process items
     docs = [item["content"] for item in knowledge_items]
     metadatas = [
@@ -181,14 +194,11 @@ def seed_expanded_data():
         } 
         for item in knowledge_items
     ]
-    ids = [f"seed_exp_{i}" for i in range(len(knowledge_items))]
 
+    # add_documents embeds with the configured provider and updates the
+    # counters, chunks, lexical index and translation queue
     print("💾 Ingesting into ChromaDB...")
-    rag.collection.add(
-        documents=docs,
-        metadatas=metadatas,
-        ids=ids
-    )
+    rag.add_documents(docs, metadatas)
     print("✅ Successfully expanded knowledge base!")
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+"""Semantic cache of generated chat answers.
+
+Paraphrased questions reuse a stored answer when their query embeddings are
+close enough and retrieval returned the same sources. Sources are compared
+by (doc_id, content_hash), so an answer is never served once a cited
+document has changed; deleting a document also drops its answers eagerly.
+"""
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def source_signature(results: Sequence[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+    """Identify a retrieved source set by document id and content hash."""
+    return tuple(sorted(
+        (str(result.get("id", "")), (result.get("metadata") or {}).get("content_hash", ""))
+        for result in results
+    ))
+
+
+class SemanticAnswerCache:
+    """TTL + LRU cache of answers looked up by query-embedding similarity.
+
+    Args:
+        max_size: Maximum number of stored answers (least recently used evicted)
+        ttl: Seconds an answer stays valid
+        threshold: Minimum cosine similarity between query embeddings
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 3600, threshold: float = 0.92):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._ids = count()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.array(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) + 1e-12)
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if entry["expires_at"] <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, query_embedding: Sequence[float], sources: Tuple[Tuple[str, str], ...]) -> Optional[Dict[str, Any]]:
+        """Find the most similar stored answer with the same source set.
+
+        Returns:
+            The stored answer payload, or None
+        """
+        query = self._normalize(query_embedding)
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry["sources"] == sources]
+            if candidates:
+                similarities = np.stack([entry["embedding"] for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry["answer"]
+            self.misses += 1
+            return None
+
+    def set(self, query_embedding: Sequence[float], sources: Tuple[Tuple[str, str], ...], answer: Dict[str, Any]):
+        """Store an answer for a query embedding and source set."""
+        with self._lock:
+            self._entries[next(self._ids)] = {
+                "embedding": self._normalize(query_embedding),
+                "sources": sources,
+                "doc_ids": {doc_id for doc_id, _ in sources},
+                "answer": answer,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_documents(self, doc_ids: Iterable[str]) -> int:
+        """Drop answers citing any of doc_ids.
+
+        Returns:
+            Number of answers removed
+        """
+        doc_ids = set(doc_ids)
+        with self._lock:
+            stale: List[int] = [key for key, entry in self._entries.items() if entry["doc_ids"] & doc_ids]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and hit-rate counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+# Singleton instance
+_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get the answer cache singleton."""
+    global _answer_cache
+    if _answer_cache is None:
+        from app.config import get_settings
+
+        settings = get_settings()
+        _answer_cache = SemanticAnswerCache(
+            max_size=settings.answer_cache_size,
+            ttl=settings.answer_cache_ttl,
+            threshold=settings.answer_cache_threshold,
+        )
+    return _answer_cache
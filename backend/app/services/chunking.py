@@ -0,0 +1,101 @@
+"""Split long Markdown documents into overlapping passages for retrieval."""
+import re
+from typing import List
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+_SENTENCE_RE = re.compile(r"(?<=[。！？.!?；;])\s*")
+
+
+def _split_sections(text: str) -> List[str]:
+    """Split text into sections that each start at a Markdown heading."""
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if _HEADING_RE.match(line) and any(l.strip() for l in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+    return ["\n".join(lines).strip() for lines in sections if any(l.strip() for l in lines)]
+
+
+def _split_long(paragraph: str, chunk_size: int) -> List[str]:
+    """Split an oversized paragraph on sentence boundaries, hard-wrapping if needed."""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_RE.split(paragraph):
+        if not sentence:
+            continue
+        while len(sentence) > chunk_size:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:chunk_size])
+            sentence = sentence[chunk_size:]
+        if current and len(current) + len(sentence) + 1 > chunk_size:
+            pieces.append(current)
+            current = sentence
+        else:
+            # Chinese sentences are not separated by spaces
+            joiner = "" if current.endswith(("。", "！", "？", "；")) else " "
+            current = f"{current}{joiner}{sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_markdown(text: str, chunk_size: int = 800, overlap: int = 100) -> List[str]:
+    """Split Markdown into passages of roughly chunk_size characters.
+
+    Sections are split on headings, then packed paragraph by paragraph.
+    Every chunk of a section repeats the section heading, and consecutive
+    chunks of the same section share ``overlap`` trailing characters so a
+    fact spanning a boundary is still retrievable.
+
+    Args:
+        text: Markdown (or plain) text
+        chunk_size: Target maximum characters per chunk
+        overlap: Characters of the previous chunk repeated at the start of the next
+
+    Returns:
+        List of chunk texts (a single chunk for short documents)
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    for section in _split_sections(text):
+        lines = section.split("\n", 1)
+        heading = lines[0] if _HEADING_RE.match(lines[0]) else ""
+        body = (lines[1] if len(lines) > 1 else "") if heading else section
+
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", body):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if len(paragraph) > chunk_size:
+                paragraphs.extend(_split_long(paragraph, chunk_size))
+            else:
+                paragraphs.append(paragraph)
+
+        if not paragraphs:
+            if heading:
+                chunks.append(heading)
+            continue
+
+        current = ""
+        section_chunks = []
+        for paragraph in paragraphs:
+            if current and len(current) + len(paragraph) + 2 > chunk_size:
+                section_chunks.append(current)
+                tail = current[-overlap:] if overlap > 0 else ""
+                current = f"{tail}\n\n{paragraph}" if tail else paragraph
+            else:
+                current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            section_chunks.append(current)
+
+        chunks.extend(f"{heading}\n\n{chunk}" if heading else chunk for chunk in section_chunks)
+
+    return chunks
@@ -5,16 +5,10 @@ from duckduckgo_search import DDGS
 import trafilatura
 from concurrent.futures import ThreadPoolExecutor
 
-from app.config import get_settings
-import google.generativeai as genai
+from app.services.llm_gateway import Priority, get_llm_gateway
 
 class CollectorService:
     """Service for finding and processing online health content."""
-    
-    def __init__(self):
-        settings = get_settings()
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
 
     def search_web(self, query: str, max_results: int = 10) -> List[Dict[str, str]]:
         """Search the web for health guidelines using DuckDuckGo with Google fallback."""
@@ -108,8 +102,6 @@ class CollectorService:
 
     async def _clean_with_ai(self, raw_text: str, url: str) -> Dict[str, Any]:
         """Use Gemini to clean text and extract metadata."""
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
         prompt = f"""
 You are a professional medical editor. Your task is to process the following raw web content into a structured knowledge base entry.
 
@@ -140,13 +132,14 @@ OUTPUT FORMAT (JSON ONLY):
 """
         
         try:
-            # Add simple retry
-            response = await model.generate_content_async(
-                 prompt,
-                 generation_config={"response_mime_type": "application/json"}
+            response = await get_llm_gateway().agenerate(
+                prompt,
+                priority=Priority.BACKGROUND,
+                generation_config={"response_mime_type": "application/json"},
+                max_output_tokens=4096,
             )
             import json
-            return json.loads(response.text)
+            return json.loads(response)
         except Exception as e:
             print(f"AI cleaning failed: {e}")
             # Fallback
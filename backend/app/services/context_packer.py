@@ -0,0 +1,202 @@
+"""Token-budgeted packing of retrieved documents into RAG prompts.
+
+Each document gets a share of the budget proportional to its relevance
+weighted by authority tier; shares a short document does not need are
+handed to the others. A document larger than its share keeps the sentences
+that best match the query, in their original order.
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.services.lexical import tokenize
+from app.services.metrics import CONTEXT_TOKENS
+from app.services.tokens import estimate_tokens
+
+# Authoritative sources get a larger share of the budget
+TIER_WEIGHTS = {1: 1.0, 2: 0.85, 3: 0.7, 4: 0.55}
+
+# Weight given to documents with no positive relevance
+MIN_WEIGHT = 0.01
+
+# Sentence ends (Chinese and Latin punctuation) and line breaks
+_SENTENCE_RE = re.compile(r"[^\n。！？!?.]*(?:[。！？!?]+|\.(?=\s|$)|\n+|$)")
+
+GAP = " … "
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences (and lines), dropping empty pieces."""
+    return [piece.strip() for piece in _SENTENCE_RE.findall(text or "") if piece.strip()]
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    """Cut text to roughly token_budget tokens."""
+    if estimate_tokens(text) <= token_budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= token_budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + "…" if low else ""
+
+
+def select_sentences(query: str, text: str, token_budget: int) -> str:
+    """Keep the sentences of text most relevant to query within token_budget.
+
+    Sentences are scored by overlap with the query's terms; ties favour
+    earlier sentences. Kept sentences stay in document order, with an
+    ellipsis marking skipped text.
+    """
+    if token_budget <= 0:
+        return ""
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+
+    query_terms = set(tokenize(query))
+    scored = []
+    for index, sentence in enumerate(sentences):
+        terms = tokenize(sentence)
+        overlap = sum(1 for term in terms if term in query_terms)
+        scored.append((overlap / (len(terms) ** 0.5 or 1), -index, index))
+
+    kept = []
+    used = 0
+    for _, _, index in sorted(scored, reverse=True):
+        tokens = estimate_tokens(sentences[index])
+        if used + tokens <= token_budget:
+            kept.append(index)
+            used += tokens
+
+    if not kept:
+        # Even the best sentence is too long: cut it
+        best = max(scored)[2]
+        return _truncate(sentences[best], token_budget)
+
+    kept.sort()
+    parts = []
+    for position, index in enumerate(kept):
+        if position and index != kept[position - 1] + 1:
+            parts.append(GAP)
+        elif position:
+            parts.append(" ")
+        parts.append(sentences[index])
+    return "".join(parts)
+
+
+def allocate_budget(weights: List[float], sizes: List[int], token_budget: int) -> List[int]:
+    """Split token_budget across documents in proportion to weights.
+
+    A document never gets more than its size; what it leaves unused is
+    redistributed to the rest. Zero or negative weights (L2 relevance is
+    often <= 0) count as MIN_WEIGHT, so such documents get a small share
+    and never more than the budget.
+    """
+    weights = [max(weight, MIN_WEIGHT) for weight in weights]
+    allocation = [0] * len(sizes)
+    open_docs = [i for i, size in enumerate(sizes) if size > 0]
+    remaining = token_budget
+    while open_docs and remaining > 0:
+        total_weight = sum(weights[i] for i in open_docs)
+        shares = {i: remaining * weights[i] / total_weight for i in open_docs}
+        satisfied = [i for i in open_docs if sizes[i] - allocation[i] <= shares[i]]
+        if not satisfied:
+            for i in open_docs:
+                allocation[i] += int(shares[i])
+            break
+        for i in satisfied:
+            needed = min(sizes[i] - allocation[i], remaining)
+            remaining -= needed
+            allocation[i] += needed
+        open_docs = [i for i in open_docs if i not in satisfied]
+    return allocation
+
+
+class ContextPacker:
+    """Fit retrieved documents into a prompt token budget.
+
+    Args:
+        token_budget: Maximum estimated tokens of document text per prompt
+        overhead_tokens: Tokens reserved per document for its header line
+    """
+
+    def __init__(self, token_budget: int = 3000, overhead_tokens: int = 20):
+        self.token_budget = token_budget
+        self.overhead_tokens = overhead_tokens
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._packed_tokens = 0
+        self._source_tokens = 0
+        self._max_packed = 0
+        self._last_packed = 0
+
+    def pack(self, query: str, docs: List[Dict[str, Any]], token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """Pack docs (search results) for query.
+
+        Returns:
+            Dict with "documents" (the input results with "content" replaced
+            by the packed text; documents that got no budget are dropped),
+            "tokens" (packed estimate) and "source_tokens" (before packing)
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        budget = max(0, budget - self.overhead_tokens * len(docs))
+
+        sizes = [estimate_tokens(doc.get("content", "")) for doc in docs]
+        weights = [
+            max(doc.get("relevance_score", 0.0), 0.0) * TIER_WEIGHTS.get((doc.get("metadata") or {}).get("tier", 4), 0.55)
+            for doc in docs
+        ]
+        allocation = allocate_budget(weights, sizes, budget)
+
+        packed_docs = []
+        packed_tokens = 0
+        for doc, size, allotted in zip(docs, sizes, allocation):
+            content = doc.get("content", "")
+            if allotted < size:
+                content = select_sentences(query, content, allotted)
+            if not content:
+                continue
+            packed_docs.append({**doc, "content": content})
+            packed_tokens += estimate_tokens(content)
+
+        self._record(packed_tokens, sum(sizes))
+        return {"documents": packed_docs, "tokens": packed_tokens, "source_tokens": sum(sizes)}
+
+    def _record(self, packed_tokens: int, source_tokens: int):
+        CONTEXT_TOKENS.observe(packed_tokens)
+        with self._lock:
+            self._requests += 1
+            self._packed_tokens += packed_tokens
+            self._source_tokens += source_tokens
+            self._max_packed = max(self._max_packed, packed_tokens)
+            self._last_packed = packed_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Get packed-size counters."""
+        with self._lock:
+            return {
+                "token_budget": self.token_budget,
+                "requests": self._requests,
+                "avg_packed_tokens": self._packed_tokens / self._requests if self._requests else 0.0,
+                "max_packed_tokens": self._max_packed,
+                "last_packed_tokens": self._last_packed,
+                "compression": self._packed_tokens / self._source_tokens if self._source_tokens else 1.0,
+            }
+
+
+# Singleton instance
+_context_packer: Optional[ContextPacker] = None
+
+
+def get_context_packer() -> ContextPacker:
+    """Get the context packer singleton."""
+    global _context_packer
+    if _context_packer is None:
+        from app.config import get_settings
+
+        _context_packer = ContextPacker(token_budget=get_settings().context_token_budget)
+    return _context_packer
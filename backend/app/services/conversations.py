@@ -0,0 +1,218 @@
+"""Server-side chat conversation store.
+
+Messages are appended to the application database by a background writer
+that commits them in batches, so /api/chat/send never waits on a write.
+Reads see messages that are still buffered. History for prompts is loaded
+newest first until a token budget is spent, not by message count.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.db import connect
+from app.services.tokens import estimate_tokens
+
+
+def trim_to_budget(messages: List[Dict[str, Any]], token_budget: int) -> List[Dict[str, Any]]:
+    """Keep the most recent messages whose estimated tokens fit token_budget."""
+    kept: List[Dict[str, Any]] = []
+    used = 0
+    for message in reversed(messages):
+        tokens = message.get("tokens")
+        if tokens is None:
+            tokens = estimate_tokens(message.get("content", ""))
+        if used + tokens > token_budget:
+            break
+        used += tokens
+        kept.append(message)
+    kept.reverse()
+    return kept
+
+
+class ConversationStore:
+    """Append-only conversation messages in SQLite with batched writes.
+
+    Args:
+        db_path: SQLite file (defaults to DATABASE_URL)
+        flush_interval: Seconds between background commits
+        batch_size: Buffered messages that trigger an early commit
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, flush_interval: float = 0.5, batch_size: int = 100):
+        self._db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        with connect(self._db_path) as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation "
+                "ON chat_messages (conversation_id, id)"
+            )
+
+        self._lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        # Held while a batch is written so deletes cannot interleave with it
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written = 0
+        self.batches = 0
+
+    def append(self, conversation_id: str, role: str, content: str):
+        """Buffer a message for the background writer."""
+        message = {
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+            "tokens": estimate_tokens(content),
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._pending.append(message)
+            full = len(self._pending) >= self.batch_size
+        self.start()
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write buffered messages in one transaction.
+
+        Returns:
+            Number of messages written
+        """
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            with connect(self._db_path) as conn:
+                conn.executemany(
+                    """INSERT INTO chat_messages (conversation_id, role, content, tokens, created_at)
+                       VALUES (:conversation_id, :role, :content, :tokens, :created_at)""",
+                    batch,
+                )
+            self.written += len(batch)
+            self.batches += 1
+            return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Conversation flush failed: {e}")
+
+    def start(self):
+        """Start the background writer if it is not running."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the writer and commit anything still buffered."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _buffered(self, conversation_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [m for m in self._pending if m["conversation_id"] == conversation_id]
+
+    def get_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get every message of a conversation, oldest first."""
+        # No batch may move from the buffer to the table between the two reads
+        with self._write_lock:
+            with connect(self._db_path) as conn:
+                rows = conn.execute(
+                    """SELECT role, content, tokens, created_at FROM chat_messages
+                       WHERE conversation_id = ? ORDER BY id""",
+                    (conversation_id,),
+                ).fetchall()
+            return [dict(row) for row in rows] + self._buffered(conversation_id)
+
+    def get_history(self, conversation_id: str, token_budget: int) -> List[Dict[str, Any]]:
+        """Get the most recent messages that fit token_budget, oldest first."""
+        with self._write_lock:
+            buffered = self._buffered(conversation_id)
+            kept = trim_to_budget(buffered, token_budget)
+            if len(kept) < len(buffered):
+                return kept
+            remaining = token_budget - sum(m["tokens"] for m in kept)
+
+            stored: List[Dict[str, Any]] = []
+            with connect(self._db_path) as conn:
+                # Rows stream newest first; stop reading once the budget is spent
+                cursor = conn.execute(
+                    """SELECT role, content, tokens, created_at FROM chat_messages
+                       WHERE conversation_id = ? ORDER BY id DESC""",
+                    (conversation_id,),
+                )
+                for row in cursor:
+                    if row["tokens"] > remaining:
+                        break
+                    remaining -= row["tokens"]
+                    stored.append(dict(row))
+        stored.reverse()
+        return stored + kept
+
+    def delete(self, conversation_id: str) -> int:
+        """Delete a conversation, including buffered messages.
+
+        Returns:
+            Number of messages removed
+        """
+        with self._write_lock:
+            with self._lock:
+                before = len(self._pending)
+                self._pending = [m for m in self._pending if m["conversation_id"] != conversation_id]
+                removed = before - len(self._pending)
+            with connect(self._db_path) as conn:
+                cursor = conn.execute(
+                    "DELETE FROM chat_messages WHERE conversation_id = ?", (conversation_id,)
+                )
+                return removed + cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Get writer counters."""
+        with self._lock:
+            pending = len(self._pending)
+        return {"pending": pending, "written": self.written, "batches": self.batches}
+
+
+# Singleton instance
+_conversation_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get the conversation store singleton."""
+    global _conversation_store
+    if _conversation_store is None:
+        from app.config import get_settings
+
+        settings = get_settings()
+        _conversation_store = ConversationStore(
+            flush_interval=settings.conversation_flush_interval,
+            batch_size=settings.conversation_batch_size,
+        )
+    return _conversation_store
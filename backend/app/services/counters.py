@@ -0,0 +1,98 @@
+"""Persistent per-category/tier document counters.
+
+Counting categories by scanning the whole Chroma collection pulls every
+document's metadata into memory. Instead, RAGService keeps this small table
+in the application database up to date on every add and delete.
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.db import connect
+
+
+class DocumentCounter:
+    """Document counts keyed by (category, tier), stored in SQLite."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        with connect(self._db_path) as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS document_counts (
+                    category TEXT NOT NULL,
+                    tier INTEGER NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (category, tier)
+                )"""
+            )
+
+    @staticmethod
+    def _keys(metadatas: Iterable[Optional[Dict[str, Any]]]) -> Counter:
+        return Counter(
+            ((meta or {}).get("category", "uncategorized"), (meta or {}).get("tier", 4))
+            for meta in metadatas
+        )
+
+    def _apply(self, deltas: Dict[Tuple[str, int], int]):
+        """Apply count deltas in a single transaction."""
+        if not deltas:
+            return
+        with connect(self._db_path) as conn:
+            conn.executemany(
+                """INSERT INTO document_counts (category, tier, count) VALUES (?, ?, ?)
+                   ON CONFLICT (category, tier) DO UPDATE SET count = count + excluded.count""",
+                [(category, tier, delta) for (category, tier), delta in deltas.items()],
+            )
+            conn.execute("DELETE FROM document_counts WHERE count <= 0")
+
+    def increment(self, metadatas: List[Optional[Dict[str, Any]]]):
+        """Count newly added documents."""
+        self._apply(self._keys(metadatas))
+
+    def decrement(self, metadatas: List[Optional[Dict[str, Any]]]):
+        """Un-count deleted documents."""
+        self._apply({key: -n for key, n in self._keys(metadatas).items()})
+
+    def category_counts(self) -> Dict[str, int]:
+        """Get the number of documents per category."""
+        with connect(self._db_path) as conn:
+            rows = conn.execute(
+                "SELECT category, SUM(count) AS n FROM document_counts GROUP BY category"
+            ).fetchall()
+        return {row["category"]: row["n"] for row in rows}
+
+    def count(self, category: Optional[str] = None, tier: Optional[int] = None) -> int:
+        """Get the number of documents matching optional category/tier filters."""
+        query = "SELECT COALESCE(SUM(count), 0) FROM document_counts WHERE 1 = 1"
+        params: List[Any] = []
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+        if tier:
+            query += " AND tier = ?"
+            params.append(tier)
+        with connect(self._db_path) as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def rebuild(self, collection, page_size: int = 1000) -> int:
+        """Recount every document in a Chroma collection.
+
+        Returns:
+            Total number of documents counted
+        """
+        counts: Counter = Counter()
+        offset = 0
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            counts.update(self._keys(page["metadatas"]))
+            offset += len(page["ids"])
+
+        with connect(self._db_path) as conn:
+            conn.execute("DELETE FROM document_counts")
+            conn.executemany(
+                "INSERT INTO document_counts (category, tier, count) VALUES (?, ?, ?)",
+                [(category, tier, n) for (category, tier), n in counts.items()],
+            )
+        return sum(counts.values())
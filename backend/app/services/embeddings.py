@@ -0,0 +1,235 @@
+"""Local embedding providers.
+
+RAGService embeds documents and queries itself (instead of letting Chroma do
+it implicitly) so that model choice, batch size and CPU threading are under
+our control. Changing the model of a populated collection requires
+re-ingesting it, since stored vectors are not comparable across models;
+each collection records the model that embedded it, and RAGService refuses
+to start on a mismatch.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import Settings, get_settings
+
+
+class EmbeddingMismatchError(Exception):
+    """Raised when a collection was embedded with a different model than configured."""
+
+
+class Embedder:
+    """Base class: turns a list of texts into a list of vectors."""
+
+    name = "base"
+
+    def __init__(self, batch_size: int = 32):
+        self.batch_size = batch_size
+        self._dimension: Optional[int] = None
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the vector space: texts embedded under the same id are comparable."""
+        return self.name
+
+    @property
+    def dimension(self) -> int:
+        """Vector size (embeds one text the first time)."""
+        if self._dimension is None:
+            self._dimension = len(self.embed(["dimension"])[0])
+        return self._dimension
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches of batch_size."""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[start:start + self.batch_size]))
+        return vectors
+
+    def warm_up(self):
+        """Load the model and run one inference so the first request is not slow."""
+        self.embed(["warm up"])
+
+
+class ChromaDefaultEmbedder(Embedder):
+    """Chroma's bundled all-MiniLM-L6-v2 ONNX model (the historical default)."""
+
+    name = "default"
+
+    @property
+    def model_id(self) -> str:
+        return "chroma-default/all-MiniLM-L6-v2"
+
+    def __init__(self, batch_size: int = 32):
+        super().__init__(batch_size)
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+        self._fn = DefaultEmbeddingFunction()
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [list(map(float, vector)) for vector in self._fn(texts)]
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """sentence-transformers model on CPU, optionally ONNX or int8-quantized.
+
+    Args:
+        model_name: Hugging Face model id or local path
+        backend: "torch" or "onnx" (requires sentence-transformers>=3.2 with onnx extras)
+        quantize: int8 dynamic quantization for torch; for onnx, pick a
+            quantized export via onnx_file (e.g. "onnx/model_qint8_avx512.onnx")
+        onnx_file: ONNX file inside the model repo
+        batch_size: Texts per forward pass
+        num_threads: Intra-op CPU threads (0 keeps the library default)
+    """
+
+    name = "sentence-transformers"
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        quantize: bool = False,
+        onnx_file: str = "",
+        batch_size: int = 32,
+        num_threads: int = 0,
+    ):
+        super().__init__(batch_size)
+        self.model_name = model_name
+        self.backend = backend
+        self.quantize = quantize
+        self.onnx_file = onnx_file
+        self.num_threads = num_threads
+        self._model = None
+
+    @property
+    def model_id(self) -> str:
+        return self.model_name
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.num_threads:
+            import torch
+            torch.set_num_threads(self.num_threads)
+
+        if self.backend == "onnx":
+            model_kwargs: Dict[str, Any] = {}
+            if self.num_threads:
+                import onnxruntime
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = self.num_threads
+                model_kwargs["session_options"] = options
+            if self.onnx_file:
+                model_kwargs["file_name"] = self.onnx_file
+            return SentenceTransformer(
+                self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+            )
+
+        model = SentenceTransformer(self.model_name, device="cpu")
+        if self.quantize:
+            import torch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._load()
+        return self._model
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+
+def create_embedder(settings: Optional[Settings] = None) -> Embedder:
+    """Create the embedder configured by EMBEDDING_* settings."""
+    settings = settings or get_settings()
+
+    if settings.embedding_provider == "default":
+        return ChromaDefaultEmbedder(batch_size=settings.embedding_batch_size)
+    if settings.embedding_provider == "sentence-transformers":
+        return SentenceTransformerEmbedder(
+            model_name=settings.embedding_model,
+            backend=settings.embedding_backend,
+            quantize=settings.embedding_quantize,
+            onnx_file=settings.embedding_onnx_file,
+            batch_size=settings.embedding_batch_size,
+            num_threads=settings.embedding_threads,
+        )
+    raise ValueError(f"Unknown embedding provider: {settings.embedding_provider}")
+
+
+def check_collection_embedding(collection, embedder: Embedder):
+    """Record the embedding model of a new collection, or verify a populated one's.
+
+    Collections populated before the model was recorded are checked by the
+    size of a stored vector, then recorded as embedded by the current model.
+
+    Raises:
+        EmbeddingMismatchError: If the collection holds vectors of another model
+    """
+    metadata = dict(collection.metadata or {})
+    recorded = metadata.get("embedding_model")
+    hint = (
+        "Set EMBEDDING_PROVIDER/EMBEDDING_MODEL back to the recorded model, or re-embed: "
+        "delete the Chroma directory (CHROMA_PERSIST_DIRECTORY) and restart to reload the knowledge base."
+    )
+
+    if recorded is not None:
+        if recorded != embedder.model_id:
+            raise EmbeddingMismatchError(
+                f"Collection '{collection.name}' was embedded with {recorded} "
+                f"({metadata.get('embedding_dimension')} dimensions), but {embedder.model_id} is configured. {hint}"
+            )
+        return
+
+    if collection.count():
+        stored = collection.get(limit=1, include=["embeddings"])["embeddings"][0]
+        if len(stored) != embedder.dimension:
+            raise EmbeddingMismatchError(
+                f"Collection '{collection.name}' holds {len(stored)}-dimensional vectors, but "
+                f"{embedder.model_id} produces {embedder.dimension}. {hint}"
+            )
+        print(f"Recording {embedder.model_id} as the embedding model of existing collection '{collection.name}'.")
+
+    metadata.update(embedding_model=embedder.model_id, embedding_dimension=embedder.dimension)
+    collection.modify(metadata=metadata)
+
+
+def benchmark_embedder(embedder: Embedder, texts: List[str], rounds: int = 3) -> Dict[str, Any]:
+    """Measure embedding throughput.
+
+    Args:
+        embedder: Embedder to measure (warmed up first)
+        texts: Corpus to embed each round
+        rounds: Number of timed passes over the corpus
+
+    Returns:
+        Dict with texts/sec and per-round timings
+    """
+    embedder.warm_up()
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        embedder.embed(texts)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        "embedder": embedder.name,
+        "batch_size": embedder.batch_size,
+        "texts": len(texts),
+        "rounds": rounds,
+        "seconds": timings,
+        "texts_per_second": len(texts) / best if best else 0.0,
+    }
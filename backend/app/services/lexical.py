@@ -0,0 +1,164 @@
+"""In-process BM25 inverted index used for hybrid (lexical + vector) retrieval."""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Latin words/numbers, keeping compound terms such as "4-7-8" or "spo2"
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+# CJK Unified Ideographs (incl. Extension A) - Chinese has no whitespace
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize mixed Chinese/English text.
+
+    English is split into lowercase words (compound terms like "4-7-8" are
+    also emitted as their parts). Chinese runs are split into character
+    unigrams and bigrams, which works well without a segmentation model.
+    """
+    if not text:
+        return []
+
+    text = text.lower()
+    tokens = []
+
+    for match in _WORD_RE.finditer(text):
+        word = match.group()
+        tokens.append(word)
+        if "-" in word or "." in word:
+            tokens.extend(part for part in re.split(r"[-.]", word) if part)
+
+    for match in _CJK_RE.finditer(text):
+        run = match.group()
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    return tokens
+
+
+class BM25Index:
+    """Thread-safe BM25 inverted index over document ids.
+
+    Only the filterable metadata (category, tier) is kept per document, so
+    memory stays proportional to the vocabulary rather than the corpus text.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._doc_meta: Dict[str, Dict[str, Any]] = {}
+        self._total_len = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """Index (or re-index) a single document."""
+        terms = Counter(tokenize(text))
+        metadata = metadata or {}
+
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._doc_terms[doc_id] = dict(terms)
+            self._doc_len[doc_id] = sum(terms.values())
+            self._doc_meta[doc_id] = {
+                "category": metadata.get("category"),
+                "tier": metadata.get("tier"),
+            }
+            self._total_len += self._doc_len[doc_id]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+    def add_many(self, items: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        """Index multiple (doc_id, text, metadata) tuples."""
+        for doc_id, text, metadata in items:
+            self.add(doc_id, text, metadata)
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index if present."""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+        self._doc_meta.pop(doc_id, None)
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 10,
+        category: Optional[str] = None,
+        tier: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return the top (doc_id, bm25_score) pairs for a query."""
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if n_docs == 0:
+                return []
+            avg_len = self._total_len / n_docs
+
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+
+                df = len(posting)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in posting.items():
+                    meta = self._doc_meta[doc_id]
+                    if category and meta.get("category") != category:
+                        continue
+                    if tier and meta.get("tier") != tier:
+                        continue
+
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(n_results, scores.items(), key=lambda kv: kv[1])
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists with reciprocal-rank fusion.
+
+    Args:
+        rankings: Ranked lists of document ids (best first)
+        k: RRF damping constant; 60 is the value from the original paper
+
+    Returns:
+        (doc_id, fused_score) pairs, best first
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def normalize_rrf(score: float, n_rankings: int, k: int = 60) -> float:
+    """Scale a fused RRF score to [0, 1]: 1.0 means ranked first in every list."""
+    best = n_rankings / (k + 1)
+    return min(score / best, 1.0) if best else 0.0
@@ -1,7 +1,9 @@
 """LLM service using Google Gemini API."""
-import google.generativeai as genai
 from typing import List, Dict, Any, Optional
-from app.config import get_settings
+from app.services.llm_gateway import Priority, get_llm_gateway
+from app.services.llm_providers import llm_configured
+from app.services.metrics import stage
+from app.services.rerank import result_score
 
 
 class LLMService:
@@ -9,17 +11,12 @@ class LLMService:
     
     def __init__(self):
         """Initialize Gemini client."""
-        settings = get_settings()
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
-            self._model = genai.GenerativeModel("gemini-2.0-flash")
-        else:
-            self._model = None
+        self._gateway = get_llm_gateway() if llm_configured() else None
     
     @property
     def is_available(self) -> bool:
         """Check if LLM is available."""
-        return self._model is not None
+        return self._gateway is not None
     
     def _build_rag_prompt(
         self,
@@ -37,9 +34,12 @@ class LLMService:
         Returns:
             Formatted prompt string
         """
-        # Build context section
+        from app.services.context_packer import get_context_packer
+        
+        # Build context section from documents fitted into the token budget
+        packed_docs = get_context_packer().pack(query, context_docs)["documents"]
         context_parts = []
-        for i, doc in enumerate(context_docs, 1):
+        for i, doc in enumerate(packed_docs, 1):
             source = doc.get("metadata", {}).get("source", "Unknown")
             tier = doc.get("metadata", {}).get("tier", 4)
             tier_label = {1: "权威指南", 2: "医疗机构", 3: "研究论文", 4: "参考资料"}.get(tier, "参考")
@@ -130,14 +130,15 @@ class LLMService:
             }
         
         # Build and execute prompt
-        prompt = self._build_rag_prompt(query, context_docs, language)
+        with stage("prompt_build"):
+            prompt = self._build_rag_prompt(query, context_docs, language)
         
         try:
-            response = self._model.generate_content(prompt)
+            text = await self._gateway.agenerate(prompt, priority=Priority.INTERACTIVE)
             
             # Determine confidence based on source quality
             max_tier = min(doc.get("metadata", {}).get("tier", 4) for doc in context_docs)
-            avg_relevance = sum(doc.get("relevance_score", 0) for doc in context_docs) / len(context_docs)
+            avg_relevance = sum(result_score(doc) for doc in context_docs) / len(context_docs)
             
             if max_tier <= 2 and avg_relevance > 0.7:
                 confidence = "high"
@@ -147,7 +148,7 @@ class LLMService:
                 confidence = "low"
             
             return {
-                "content": response.text,
+                "content": text,
                 "confidence": confidence,
                 "error": False,
             }
@@ -176,8 +177,7 @@ class LLMService:
             return "LLM service not configured."
         
         try:
-            response = self._model.generate_content(prompt)
-            return response.text
+            return await self._gateway.agenerate(prompt, priority=Priority.INTERACTIVE)
         except Exception as e:
             return f"Error: {str(e)}"
 
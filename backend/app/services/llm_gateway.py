@@ -0,0 +1,463 @@
+"""Process-wide gateway for LLM calls.
+
+Every LLM call (chat, translation, collector clean-up) goes through one
+gateway so they share a single budget: a token-bucket limiter on requests
+and tokens per minute, a bounded number of concurrent calls, and a
+priority queue that always admits interactive chat before browse
+translation before background work. Retries on rate limiting and fallback
+to other models are handled here too, and each retry re-enters the queue
+at its priority instead of holding a slot while it backs off. The calls
+themselves are made by an LLMProvider (Gemini, or a local stand-in).
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.config import Settings, get_settings
+from app.services.llm_providers import LLMProvider, RateLimitedError, create_llm_provider
+from app.services.metrics import STAGE_LATENCY, stage
+from app.services.tracing import span
+from app.services.tokens import estimate_tokens
+
+
+class Priority(IntEnum):
+    """Admission classes; lower values are admitted first."""
+    INTERACTIVE = 0
+    TRANSLATION = 1
+    BACKGROUND = 2
+
+
+class LLMGatewayError(Exception):
+    """Raised when every model failed or stayed rate limited."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding up to one minute's worth.
+
+    Not thread-safe on its own; LLMGateway calls it under its lock.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self._rate = rate_per_minute / 60.0
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def delay(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until amount can be taken while leaving reserve in the bucket (0 if now)."""
+        if self._rate <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        needed = min(amount + reserve, self.capacity)
+        return max(0.0, (needed - self._level) / self._rate)
+
+    def take(self, amount: float):
+        if self._rate > 0:
+            self._level -= min(amount, self.capacity)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "enqueued_at", "grant", "granted", "cancelled")
+
+    def __init__(self, priority: Priority, seq: int, tokens: int, grant: Callable[[], None]):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.grant = grant
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMGateway:
+    """Rate-limited, prioritised access to the LLM shared by all callers.
+
+    Args:
+        provider: Provider making the calls
+        models: Models to try in order; later ones are fallbacks
+        requests_per_minute: Request budget (0 disables the limit)
+        tokens_per_minute: Estimated token budget (0 disables the limit)
+        max_concurrency: Calls in flight at once
+        interactive_reserve: Slots only interactive calls may use
+        interactive_rate_share: Fraction of the request/token budgets other
+            classes must leave in the buckets for interactive calls
+        max_retries: Attempts per model on rate limiting
+        retry_delay: Initial backoff in seconds, doubled per attempt
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        models: List[str],
+        requests_per_minute: float = 15,
+        tokens_per_minute: float = 1_000_000,
+        max_concurrency: int = 4,
+        interactive_reserve: int = 1,
+        interactive_rate_share: float = 0.2,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        self.provider = provider
+        self.models = models
+        self.max_concurrency = max_concurrency
+        self.interactive_reserve = min(interactive_reserve, max_concurrency - 1)
+        self.interactive_rate_share = interactive_rate_share
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[threading.Timer] = None
+        self._timer_due = 0.0
+
+        self._metrics: Dict[Priority, Dict[str, Any]] = {
+            priority: {"requests": 0, "wait_total": 0.0, "wait_max": 0.0, "waits": deque(maxlen=1000)}
+            for priority in Priority
+        }
+        self._retries: Dict[str, int] = {}
+        self._fallbacks: Dict[str, int] = {}
+        self._failures = 0
+
+    # Admission
+
+    def _limit(self, priority: Priority) -> int:
+        if priority == Priority.INTERACTIVE:
+            return self.max_concurrency
+        return self.max_concurrency - self.interactive_reserve
+
+    def _dispatch(self):
+        """Admit waiters in priority order while slots and budget allow (lock held)."""
+        while self._waiting:
+            waiter = self._waiting[0]
+            if waiter.cancelled:
+                heapq.heappop(self._waiting)
+                continue
+            if self._in_flight >= self._limit(waiter.priority):
+                return
+            share = 0.0 if waiter.priority == Priority.INTERACTIVE else self.interactive_rate_share
+            delay = max(
+                self._requests.delay(1, self._requests.capacity * share),
+                self._tokens.delay(waiter.tokens, self._tokens.capacity * share),
+            )
+            if delay > 0:
+                self._schedule_dispatch(delay)
+                return
+
+            heapq.heappop(self._waiting)
+            self._requests.take(1)
+            self._tokens.take(waiter.tokens)
+            self._in_flight += 1
+            waiter.granted = True
+
+            wait = time.monotonic() - waiter.enqueued_at
+            metrics = self._metrics[waiter.priority]
+            metrics["requests"] += 1
+            metrics["wait_total"] += wait
+            metrics["wait_max"] = max(metrics["wait_max"], wait)
+            metrics["waits"].append(wait)
+            waiter.grant()
+
+    def _schedule_dispatch(self, delay: float):
+        """Re-run dispatch once the bucket has refilled (lock held).
+
+        A waiter that needs less refill than the one the pending timer was
+        set for (an interactive call arriving behind background work that
+        must leave the interactive share) re-arms it earlier.
+        """
+        due = time.monotonic() + delay
+        if self._timer is not None:
+            if due >= self._timer_due:
+                return
+            self._timer.cancel()
+
+        def fire():
+            with self._lock:
+                # A cancelled timer may already be waiting for the lock
+                if self._timer is not timer:
+                    return
+                self._timer = None
+                self._dispatch()
+
+        timer = threading.Timer(delay, fire)
+        timer.daemon = True
+        self._timer = timer
+        self._timer_due = due
+        timer.start()
+
+    def _enqueue(self, priority: Priority, tokens: int, grant: Callable[[], None]) -> _Waiter:
+        with self._lock:
+            waiter = _Waiter(priority, next(self._seq), tokens, grant)
+            heapq.heappush(self._waiting, waiter)
+            self._dispatch()
+            return waiter
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def _acquire(self, priority: Priority, tokens: int):
+        """Block the calling thread until admitted."""
+        admitted = threading.Event()
+        self._enqueue(priority, tokens, admitted.set)
+        admitted.wait()
+
+    async def _aacquire(self, priority: Priority, tokens: int):
+        """Wait on the event loop until admitted."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve():
+            # The caller gave up after being admitted: hand the slot back
+            if future.cancelled():
+                self._release()
+            else:
+                future.set_result(None)
+
+        waiter = self._enqueue(priority, tokens, lambda: loop.call_soon_threadsafe(resolve))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    waiter.cancelled = True
+                    granted_and_resolved = False
+                else:
+                    granted_and_resolved = future.done() and not future.cancelled()
+            if granted_and_resolved:
+                self._release()
+            raise
+
+    # Calls
+
+    def _retry_wait(self, attempt: int) -> float:
+        return self.retry_delay * (2 ** attempt) + random.uniform(0, 1)
+
+    def _record_retry(self, model_name: str):
+        with self._lock:
+            self._retries[model_name] = self._retries.get(model_name, 0) + 1
+
+    def _record_outcome(self, model_index: Optional[int]):
+        with self._lock:
+            if model_index is None:
+                self._failures += 1
+            elif model_index > 0:
+                # Keyed by the fallback model that finally answered
+                model_name = self.models[model_index]
+                self._fallbacks[model_name] = self._fallbacks.get(model_name, 0) + 1
+
+    def _estimate(self, prompt: str, max_output_tokens: int) -> int:
+        return estimate_tokens(prompt) + max_output_tokens
+
+    def generate(
+        self,
+        prompt: str,
+        priority: Priority = Priority.BACKGROUND,
+        generation_config: Optional[Dict[str, Any]] = None,
+        max_output_tokens: int = 1024,
+    ) -> str:
+        """Generate text from a blocking thread.
+
+        Args:
+            prompt: Prompt text
+            priority: Admission class
+            generation_config: Passed through to the provider
+            max_output_tokens: Expected output size, charged to the token budget
+
+        Returns:
+            Response text
+
+        Raises:
+            LLMGatewayError: If every model failed
+        """
+        tokens = self._estimate(prompt, max_output_tokens)
+        for index, model_name in enumerate(self.models):
+            for attempt in range(self.max_retries):
+                with span("llm_admission", priority=priority.name.lower()):
+                    self._acquire(priority, tokens)
+                try:
+                    with stage("llm_generation", model=model_name):
+                        text = self.provider.generate(model_name, prompt, generation_config)
+                except RateLimitedError:
+                    self._record_retry(model_name)
+                    wait = self._retry_wait(attempt)
+                    print(f"Rate limited on {model_name}. Retrying in {wait:.2f}s...")
+                except Exception as e:
+                    # Not a rate limit: move on to the next model
+                    print(f"Error with {model_name}: {e}")
+                    break
+                else:
+                    self._record_outcome(index)
+                    return text
+                finally:
+                    # Never hold a slot while backing off
+                    self._release()
+                time.sleep(wait)
+        self._record_outcome(None)
+        raise LLMGatewayError("所有可用模型均忙碌，请稍后重试。")
+
+    async def agenerate(
+        self,
+        prompt: str,
+        priority: Priority = Priority.INTERACTIVE,
+        generation_config: Optional[Dict[str, Any]] = None,
+        max_output_tokens: int = 1024,
+    ) -> str:
+        """Async generate(); waits for admission without blocking the event loop."""
+        tokens = self._estimate(prompt, max_output_tokens)
+        for index, model_name in enumerate(self.models):
+            for attempt in range(self.max_retries):
+                with span("llm_admission", priority=priority.name.lower()):
+                    await self._aacquire(priority, tokens)
+                try:
+                    with stage("llm_generation", model=model_name):
+                        text = await self.provider.agenerate(model_name, prompt, generation_config)
+                except RateLimitedError:
+                    self._record_retry(model_name)
+                    wait = self._retry_wait(attempt)
+                    print(f"Rate limited on {model_name}. Retrying in {wait:.2f}s...")
+                except Exception as e:
+                    # Not a rate limit: move on to the next model
+                    print(f"Error with {model_name}: {e}")
+                    break
+                else:
+                    self._record_outcome(index)
+                    return text
+                finally:
+                    # Never hold a slot while backing off
+                    self._release()
+                await asyncio.sleep(wait)
+        self._record_outcome(None)
+        raise LLMGatewayError("所有可用模型均忙碌，请稍后重试。")
+
+    async def astream(
+        self,
+        prompt: str,
+        priority: Priority = Priority.INTERACTIVE,
+        generation_config: Optional[Dict[str, Any]] = None,
+        max_output_tokens: int = 1024,
+    ) -> AsyncIterator[str]:
+        """Stream generated text chunks.
+
+        Retries and model fallback apply until the first chunk arrives;
+        after that, errors propagate to the caller. The slot is held until
+        the stream is exhausted or closed.
+        """
+        tokens = self._estimate(prompt, max_output_tokens)
+        for index, model_name in enumerate(self.models):
+            for attempt in range(self.max_retries):
+                with span("llm_admission", priority=priority.name.lower()):
+                    await self._aacquire(priority, tokens)
+                started = time.perf_counter()
+                try:
+                    chunks = self.provider.astream(model_name, prompt, generation_config).__aiter__()
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    self._release()
+                    self._record_outcome(index)
+                    return
+                except RateLimitedError:
+                    self._release()
+                    self._record_retry(model_name)
+                    wait = self._retry_wait(attempt)
+                    print(f"Rate limited on {model_name}. Retrying in {wait:.2f}s...")
+                    await asyncio.sleep(wait)
+                    continue
+                except Exception as e:
+                    # Not a rate limit: move on to the next model
+                    self._release()
+                    print(f"Error with {model_name}: {e}")
+                    break
+                except BaseException:
+                    self._release()
+                    raise
+
+                self._record_outcome(index)
+                try:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+                finally:
+                    self._release()
+                    STAGE_LATENCY.observe(time.perf_counter() - started, stage="llm_generation")
+                return
+        self._record_outcome(None)
+        raise LLMGatewayError("所有可用模型均忙碌，请稍后重试。")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get admission, queue-wait and retry metrics per priority class."""
+        with self._lock:
+            queued = {priority.name.lower(): 0 for priority in Priority}
+            for waiter in self._waiting:
+                if not waiter.cancelled:
+                    queued[waiter.priority.name.lower()] += 1
+
+            priorities = {}
+            for priority, metrics in self._metrics.items():
+                waits = sorted(metrics["waits"])
+                priorities[priority.name.lower()] = {
+                    "requests": metrics["requests"],
+                    "queued": queued[priority.name.lower()],
+                    "wait_avg_ms": metrics["wait_total"] / metrics["requests"] * 1000 if metrics["requests"] else 0.0,
+                    "wait_p99_ms": waits[int(len(waits) * 0.99)] * 1000 if waits else 0.0,
+                    "wait_max_ms": metrics["wait_max"] * 1000,
+                }
+
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "priorities": priorities,
+                "retries": dict(self._retries),
+                "fallbacks": sum(self._fallbacks.values()),
+                "fallbacks_by_model": dict(self._fallbacks),
+                "failures": self._failures,
+            }
+
+
+def create_llm_gateway(settings: Optional[Settings] = None) -> LLMGateway:
+    """Create a gateway (and its provider) configured by LLM_* settings."""
+    settings = settings or get_settings()
+    return LLMGateway(
+        provider=create_llm_provider(settings),
+        models=[name.strip() for name in settings.llm_models.split(",") if name.strip()],
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        max_concurrency=settings.llm_max_concurrency,
+        interactive_reserve=settings.llm_interactive_reserve,
+        interactive_rate_share=settings.llm_interactive_rate_share,
+        max_retries=settings.llm_max_retries,
+    )
+
+
+# Singleton instance
+_llm_gateway: Optional[LLMGateway] = None
+_llm_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the LLM gateway singleton."""
+    global _llm_gateway
+    if _llm_gateway is None:
+        with _llm_gateway_lock:
+            if _llm_gateway is None:
+                _llm_gateway = create_llm_gateway()
+    return _llm_gateway
@@ -0,0 +1,390 @@
+"""LLM providers behind the gateway.
+
+LLMGateway handles admission, retries and model fallback; a provider only
+turns (model, prompt) into text. Besides Gemini there is a local stub with
+synthetic latency, throughput and failures, and record/replay of real
+responses from JSONL fixtures, so the whole request path can be
+load-tested without network access.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import Settings, get_settings
+from app.services.tokens import estimate_tokens
+
+
+class LLMProviderError(Exception):
+    """A call failed for a reason other than rate limiting."""
+
+
+class RateLimitedError(LLMProviderError):
+    """The provider rejected a call for rate limiting (HTTP 429); the gateway retries it."""
+
+
+class LLMProvider:
+    """Base class: generates text for a prompt with a named model."""
+
+    name = "base"
+
+    def generate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        raise NotImplementedError
+
+    async def astream(
+        self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Yield text chunks; the default streams the whole answer as one chunk."""
+        yield await self.agenerate(model, prompt, generation_config)
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini via google-generativeai."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str = ""):
+        import google.generativeai as genai
+        from google.api_core import exceptions
+
+        if api_key:
+            genai.configure(api_key=api_key)
+        self._genai = genai
+        self._rate_limited = exceptions.ResourceExhausted
+
+    def generate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        try:
+            response = self._genai.GenerativeModel(model).generate_content(
+                prompt, generation_config=generation_config
+            )
+            return response.text
+        except self._rate_limited as e:
+            raise RateLimitedError(str(e)) from e
+
+    async def agenerate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        try:
+            response = await self._genai.GenerativeModel(model).generate_content_async(
+                prompt, generation_config=generation_config
+            )
+            return response.text
+        except self._rate_limited as e:
+            raise RateLimitedError(str(e)) from e
+
+    async def astream(
+        self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        try:
+            response = await self._genai.GenerativeModel(model).generate_content_async(
+                prompt, generation_config=generation_config, stream=True
+            )
+            async for chunk in response:
+                yield _chunk_text(chunk)
+        except self._rate_limited as e:
+            raise RateLimitedError(str(e)) from e
+
+
+def _chunk_text(chunk) -> str:
+    """Text of a streamed chunk ("" for chunks without text parts, e.g. the finish marker)."""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+_STUB_WORDS = (
+    "heart rate sleep recovery stress training zone resting variability "
+    "guideline adults minutes weekly intensity aerobic evidence suggests "
+    "心率 睡眠 恢复 压力 训练 建议 成年人 每周 强度 研究"
+).split()
+
+# Last JSON array in a prompt (the batched translation payload)
+_JSON_ARRAY_RE = re.compile(r"(\[\s*\{.*\}\s*\])\s*$", re.S)
+
+
+class StubProvider(LLMProvider):
+    """Deterministic local stand-in for load testing.
+
+    The answer text depends only on the prompt. Timing and failures are
+    drawn from a seeded generator, so a run with the same call order is
+    reproducible.
+
+    Args:
+        latency_ms: Median time to first token
+        latency_sigma: Spread of the log-normal time to first token (0 = fixed)
+        tokens_per_second: Output rate after the first token (0 = instant)
+        output_tokens: Length of generated answers
+        error_rate: Fraction of calls failing with LLMProviderError
+        rate_limit_rate: Fraction of calls failing with RateLimitedError
+        seed: Seed for timing and failure draws
+        chunk_tokens: Tokens per streamed chunk
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.5,
+        tokens_per_second: float = 50.0,
+        output_tokens: int = 200,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+        chunk_tokens: int = 8,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.chunk_tokens = max(1, chunk_tokens)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> float:
+        """Inject a failure or return the time to first token in seconds."""
+        with self._lock:
+            failure = self._random.random()
+            latency = self.latency_ms / 1000.0
+            if self.latency_sigma > 0:
+                latency *= math.exp(self._random.gauss(0.0, self.latency_sigma))
+        if failure < self.rate_limit_rate:
+            raise RateLimitedError("429 stub rate limit")
+        if failure < self.rate_limit_rate + self.error_rate:
+            raise LLMProviderError("stub provider error")
+        return latency
+
+    def _answer(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> str:
+        """Answer text derived from the prompt alone."""
+        if (generation_config or {}).get("response_mime_type") == "application/json":
+            # Echo a batched JSON payload so callers parse a well-formed reply
+            match = _JSON_ARRAY_RE.search(prompt)
+            if match:
+                return match.group(1)
+            return json.dumps({"title": "Stub", "category": "general", "summary": "", "content": prompt[-2000:], "tier": 4})
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        words = random.Random(digest).choices(_STUB_WORDS, k=self.output_tokens)
+        return " ".join(words)
+
+    def _transfer_seconds(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return estimate_tokens(text) / self.tokens_per_second
+
+    def generate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        latency = self._draw()
+        text = self._answer(prompt, generation_config)
+        time.sleep(latency + self._transfer_seconds(text))
+        return text
+
+    async def agenerate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        latency = self._draw()
+        text = self._answer(prompt, generation_config)
+        await asyncio.sleep(latency + self._transfer_seconds(text))
+        return text
+
+    async def astream(
+        self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        latency = self._draw()
+        words = self._answer(prompt, generation_config).split(" ")
+        await asyncio.sleep(latency)
+        for start in range(0, len(words), self.chunk_tokens):
+            chunk = " ".join(words[start:start + self.chunk_tokens])
+            if start:
+                chunk = " " + chunk
+                await asyncio.sleep(self._transfer_seconds(chunk))
+            yield chunk
+
+
+def fixture_key(model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    """Key identifying a call in a fixture file."""
+    payload = json.dumps([model, prompt, generation_config or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordingProvider(LLMProvider):
+    """Pass calls to another provider and append successful responses to a JSONL fixture.
+
+    Args:
+        inner: Provider actually answering (normally Gemini)
+        path: Fixture file, created if missing
+    """
+
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, path: str):
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _record(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]], text: str, started: float):
+        entry = {
+            "key": fixture_key(model, prompt, generation_config),
+            "model": model,
+            "prompt": prompt,
+            "response": text,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        }
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def generate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        started = time.perf_counter()
+        text = self.inner.generate(model, prompt, generation_config)
+        self._record(model, prompt, generation_config, text, started)
+        return text
+
+    async def agenerate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        started = time.perf_counter()
+        text = await self.inner.agenerate(model, prompt, generation_config)
+        self._record(model, prompt, generation_config, text, started)
+        return text
+
+    async def astream(
+        self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        parts = []
+        async for text in self.inner.astream(model, prompt, generation_config):
+            parts.append(text)
+            yield text
+        self._record(model, prompt, generation_config, "".join(parts), started)
+
+
+class ReplayProvider(LLMProvider):
+    """Answer from a JSONL fixture written by RecordingProvider.
+
+    Args:
+        path: Fixture file
+        fallback: Provider for calls missing from the fixture (None raises LLMProviderError)
+        replay_latency: Sleep for the recorded latency before answering
+        chunk_tokens: Tokens per streamed chunk
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        path: str,
+        fallback: Optional[LLMProvider] = None,
+        replay_latency: bool = True,
+        chunk_tokens: int = 8,
+    ):
+        self.fallback = fallback
+        self.replay_latency = replay_latency
+        self.chunk_tokens = max(1, chunk_tokens)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+        self._misses = 0
+
+    def _lookup(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(fixture_key(model, prompt, generation_config))
+        if entry is None:
+            self._misses += 1
+            if self.fallback is None:
+                raise LLMProviderError(f"No recorded response for this prompt ({model})")
+        return entry
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        return entry.get("latency_ms", 0.0) / 1000.0 if self.replay_latency else 0.0
+
+    def generate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        entry = self._lookup(model, prompt, generation_config)
+        if entry is None:
+            return self.fallback.generate(model, prompt, generation_config)
+        time.sleep(self._delay(entry))
+        return entry["response"]
+
+    async def agenerate(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        entry = self._lookup(model, prompt, generation_config)
+        if entry is None:
+            return await self.fallback.agenerate(model, prompt, generation_config)
+        await asyncio.sleep(self._delay(entry))
+        return entry["response"]
+
+    async def astream(
+        self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        entry = self._lookup(model, prompt, generation_config)
+        if entry is None:
+            async for text in self.fallback.astream(model, prompt, generation_config):
+                yield text
+            return
+
+        # Recorded latency covers the whole answer: spread it over the chunks
+        words: List[str] = entry["response"].split(" ")
+        chunks = [
+            " ".join(words[start:start + self.chunk_tokens])
+            for start in range(0, len(words), self.chunk_tokens)
+        ]
+        pause = self._delay(entry) / max(len(chunks), 1)
+        for index, chunk in enumerate(chunks):
+            await asyncio.sleep(pause)
+            yield (" " + chunk) if index else chunk
+
+    @property
+    def misses(self) -> int:
+        """Calls not found in the fixture."""
+        return self._misses
+
+
+def create_stub_provider(settings: Optional[Settings] = None) -> StubProvider:
+    """Create a stub configured by LLM_STUB_* settings."""
+    settings = settings or get_settings()
+    return StubProvider(
+        latency_ms=settings.llm_stub_latency_ms,
+        latency_sigma=settings.llm_stub_latency_sigma,
+        tokens_per_second=settings.llm_stub_tokens_per_second,
+        output_tokens=settings.llm_stub_output_tokens,
+        error_rate=settings.llm_stub_error_rate,
+        rate_limit_rate=settings.llm_stub_rate_limit_rate,
+        seed=settings.llm_stub_seed,
+    )
+
+
+def create_llm_provider(settings: Optional[Settings] = None) -> LLMProvider:
+    """Create the provider configured by LLM_PROVIDER and LLM_RECORD_PATH."""
+    settings = settings or get_settings()
+
+    if settings.llm_provider == "gemini":
+        provider: LLMProvider = GeminiProvider(api_key=settings.gemini_api_key)
+    elif settings.llm_provider == "stub":
+        provider = create_stub_provider(settings)
+    elif settings.llm_provider == "replay":
+        if not settings.llm_replay_path:
+            raise ValueError("LLM_PROVIDER=replay requires LLM_REPLAY_PATH")
+        provider = ReplayProvider(
+            settings.llm_replay_path,
+            fallback=create_stub_provider(settings) if settings.llm_replay_fallback else None,
+            replay_latency=settings.llm_replay_latency,
+        )
+    else:
+        raise ValueError(f"Unknown LLM provider: {settings.llm_provider}")
+
+    if settings.llm_record_path:
+        provider = RecordingProvider(provider, settings.llm_record_path)
+    return provider
+
+
+def llm_configured(settings: Optional[Settings] = None) -> bool:
+    """Whether LLM calls can be made (Gemini needs an API key; local providers do not)."""
+    settings = settings or get_settings()
+    return settings.llm_provider != "gemini" or bool(settings.gemini_api_key)
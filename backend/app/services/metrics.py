@@ -0,0 +1,146 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Latencies are recorded into cumulative-bucket histograms as they happen:
+one per HTTP route and one per request stage (embedding, vector query,
+translation, prompt build, LLM generation), so a slow chat can be split
+into its Chroma and Gemini parts. Counters and gauges that components
+already keep (cache hits, queue depths, retries) are read at scrape time
+instead of being duplicated here.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.tracing import span
+
+# Seconds; spans a cache hit up to a slow Gemini answer
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """Render {"a": "1"} as '{a="1"}' ("" for no labels)."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """Labelled histogram with fixed cumulative buckets.
+
+    Args:
+        name: Metric name
+        help_text: HELP line
+        label_names: Label names, given as keyword arguments to observe()
+        buckets: Upper bounds (+Inf is implied); seconds by default
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> per-bucket counts (last is +Inf), and their sums
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the with-block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), self._sums[key]) for key, counts in sorted(self._counts.items())]
+        for key, counts, total in series:
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = format_labels({**labels, "le": format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+def render_samples(
+    name: str,
+    help_text: str,
+    metric_type: str,
+    samples: List[Tuple[Dict[str, str], float]],
+) -> List[str]:
+    """Render a gauge or counter whose values were read from a component's stats()."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples)
+    return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template (time to response headers for streams).",
+    ("method", "route", "status"),
+)
+
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds",
+    "Latency of request stages: embedding, vector_query, translation, prompt_build, llm_generation.",
+    ("stage",),
+)
+
+CONTEXT_TOKENS = Histogram(
+    "rag_context_tokens",
+    "Estimated tokens of retrieved text packed into each RAG prompt.",
+    buckets=(250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 16000),
+)
+
+
+@contextmanager
+def stage(name: str, **attributes: Any) -> Iterator[None]:
+    """Time a block as a request stage: `with stage("embedding"): ...`.
+
+    The block is also a span of the current request trace; attributes are
+    attached to the span only, to keep histogram label sets small.
+    """
+    with span(name, **attributes), STAGE_LATENCY.time(stage=name):
+        yield
+
+
+def render_histograms(histograms: Optional[Sequence[Histogram]] = None) -> List[str]:
+    """Render the request, stage and context-size histograms."""
+    lines: List[str] = []
+    for histogram in histograms or (REQUEST_LATENCY, STAGE_LATENCY, CONTEXT_TOKENS):
+        lines.extend(histogram.render())
+    return lines
@@ -0,0 +1,185 @@
+"""Opt-in sampling profiler for individual requests.
+
+A request is profiled when it carries the admin profiling token in the
+X-Profile header, or is picked by the configured sample rate. While it
+runs, a background thread samples the Python stack of every thread (the
+event loop, RAG executor and translation workers alike), so the profile
+also covers work handed off to other threads. Concurrent requests are
+sampled too; each stack is rooted at its thread name to tell them apart.
+
+Profiles are written in the collapsed-stack format ("frame;frame;frame
+count" per line) read by flamegraph.pl, speedscope and inferno. Only one
+request is profiled at a time.
+"""
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+# Leaf frames of threads that are just waiting for work
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval.
+
+    Args:
+        interval: Seconds between samples
+        include_idle: Keep stacks of threads waiting for work
+    """
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (not self.include_idle and _is_idle(frame)):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        """Collapsed stacks, one "frames count" line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles.
+
+    Args:
+        output_dir: Directory for .folded files
+        token: Admin token accepted in the X-Profile header ("" disables it)
+        sample_rate: Fraction of all requests profiled without the header
+        interval: Seconds between stack samples
+        max_files: Oldest profiles beyond this many are deleted
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        token: str = "",
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        max_files: int = 200,
+    ):
+        self.output_dir = Path(output_dir)
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_files = max_files
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def wanted(self, header: Optional[str]) -> bool:
+        """Whether a request with this X-Profile header value should be profiled."""
+        # Compare bytes: compare_digest rejects non-ASCII str (headers are latin-1)
+        if header and self.token and secrets.compare_digest(
+            header.encode("utf-8", "surrogateescape"), self.token.encode("utf-8")
+        ):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> Optional[StackSampler]:
+        """Start sampling, or return None if another request is being profiled."""
+        if not self._busy.acquire(blocking=False):
+            return None
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: StackSampler, method: str, path: str, duration: float) -> str:
+        """Stop sampling and write the profile.
+
+        Returns:
+            Profile id (file name without extension)
+        """
+        try:
+            sampler.stop()
+        finally:
+            self._busy.release()
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+        profile_id = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}_{secrets.token_hex(3)}"
+            f"_{method.lower()}_{slug}_{duration * 1000:.0f}ms"
+        )
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.output_dir / f"{profile_id}.folded", "w", encoding="utf-8") as f:
+            f.write(sampler.folded())
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        files = sorted(self.output_dir.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+        for path in files[: max(0, len(files) - self.max_files)]:
+            path.unlink(missing_ok=True)
+
+
+# Singleton instance
+_request_profiler: Optional[RequestProfiler] = None
+
+
+def get_request_profiler() -> RequestProfiler:
+    """Get the request profiler singleton."""
+    global _request_profiler
+    if _request_profiler is None:
+        from app.config import get_settings
+
+        settings = get_settings()
+        _request_profiler = RequestProfiler(
+            output_dir=settings.data_dir / "profiles",
+            token=settings.profiling_token,
+            sample_rate=settings.profiling_sample_rate,
+            interval=settings.profiling_interval_ms / 1000,
+            max_files=settings.profiling_max_files,
+        )
+    return _request_profiler
@@ -5,20 +5,36 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 import hashlib
 import json
+import threading
 
 from app.config import get_settings
-import google.generativeai as genai
+from app.services.answer_cache import get_answer_cache
+from app.services.cache import TTLCache
+from app.services.chunking import chunk_markdown
+from app.services.counters import DocumentCounter
+from app.services.embeddings import Embedder, check_collection_embedding, create_embedder
+from app.services.lexical import BM25Index, normalize_rrf, reciprocal_rank_fusion
+from app.services.llm_gateway import Priority, get_llm_gateway
+from app.services.metrics import stage
+from app.services.rerank import CrossEncoderReranker, mmr_select
+from app.services.singleflight import SingleFlight
+from app.services.tokens import detect_language, estimate_tokens
+from app.services.tracing import bind, span
+from app.services.translation_queue import TranslationQueue
+from app.services.translations import TranslationStore, content_hash
 from concurrent.futures import ThreadPoolExecutor
 
+
+class TranslationError(Exception):
+    """Raised when a document could not be translated (nothing is stored)."""
+
+
 class RAGService:
     """Service for managing knowledge base and semantic search."""
     
     def __init__(self):
         """Initialize ChromaDB client."""
         settings = get_settings()
-        
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
 
         persist_dir = Path(settings.chroma_persist_directory)
         persist_dir.mkdir(parents=True, exist_ok=True)
@@ -27,25 +43,88 @@ class RAGService:
             path=str(persist_dir),
             settings=ChromaSettings(anonymized_telemetry=False),
         )
+        # Documents and queries are embedded explicitly with the configured
+        # provider rather than by Chroma's implicit default
+        self._embedder = create_embedder(settings)
+        
         self._collection = self._client.get_or_create_collection(
             name="health_knowledge",
             metadata={"description": "Health and fitness knowledge base"},
         )
+        # Vectors from another model are not comparable: refuse to start
+        check_collection_embedding(self._collection, self._embedder)
+        
+        # Per-category/tier document counts, maintained on every add/delete
+        self._counters = DocumentCounter()
+        
+        # Translations live outside Chroma so queries don't carry them
+        self._translations = TranslationStore()
+        self._translation_flights = SingleFlight()
+        self._translation_batching = settings.translation_batching
+        self._translation_batch_tokens = settings.translation_batch_tokens
+        self._translation_batch_items = settings.translation_batch_items
+        
+        # New documents are queued for background translation
+        self._prewarm = settings.translation_prewarm
+        self._prewarm_languages = [
+            lang.strip() for lang in settings.prewarm_languages.split(",") if lang.strip()
+        ]
+        self._translation_queue = TranslationQueue(max_attempts=settings.prewarm_max_attempts)
+        
+        # Passage-level collection; each chunk points back to its parent document
+        self._chunking = settings.chunking_enabled
+        self._chunk_size = settings.chunk_size
+        self._chunk_overlap = settings.chunk_overlap
+        self._max_passages = settings.max_passages_per_document
+        self._chunks = self._client.get_or_create_collection(
+            name="health_knowledge_chunks",
+            metadata={"description": "Passage chunks of the health knowledge base"},
+        )
+        check_collection_embedding(self._chunks, self._embedder)
+        
+        # Lexical index for hybrid search, built lazily on first use
+        self._hybrid_default = settings.hybrid_search
+        self._rrf_k = settings.rrf_k
+        self._lexical_index: Optional[BM25Index] = None
+        self._lexical_lock = threading.Lock()
+        
+        # Cross-encoder re-ranking of over-fetched candidates
+        self._rerank_default = settings.rerank_enabled
+        self._rerank_candidates = settings.rerank_candidates
+        self._reranker: Optional[CrossEncoderReranker] = None
+        
+        # Maximal-marginal-relevance diversification
+        self._mmr_default = settings.mmr_enabled
+        self._mmr_lambda = settings.mmr_lambda
+        self._mmr_candidates = settings.mmr_candidates
+        
+        # Search result cache; keys embed the collection generation, which
+        # every write path bumps, so stale entries are never served
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        self._search_cache = TTLCache(
+            max_size=settings.search_cache_size,
+            ttl=settings.search_cache_ttl,
+        )
 
-    def _translate_text(self, text: str, target_lang: str, is_title: bool = False) -> str:
-        """Translate text using Gemini."""
+    def _translate_text(
+        self,
+        text: str,
+        target_lang: str,
+        is_title: bool = False,
+        priority: Priority = Priority.TRANSLATION,
+    ) -> str:
+        """Translate text using Gemini.
+        
+        Raises:
+            TranslationError: If the LLM call failed
+        """
         if not text:
             return ""
-        try:
-            import time
-            # Simple retry logic (since this is internal service method)
-            for _ in range(3):
-                try:
-                    model = genai.GenerativeModel('gemini-2.0-flash')
-                    lang_name = 'Chinese (Simplified)' if target_lang == 'zh' else 'English'
-                    request_type = "title" if is_title else "text"
-                    
-                    prompt = f"""Task: Translate the following {request_type} to {lang_name}.
+        lang_name = 'Chinese (Simplified)' if target_lang == 'zh' else 'English'
+        request_type = "title" if is_title else "text"
+        
+        prompt = f"""Task: Translate the following {request_type} to {lang_name}.
 Rules:
 1. Maintain professional medical tone.
 2. Output ONLY the translated {request_type}.
@@ -54,52 +133,287 @@ Rules:
 
 Original {request_type}:
 {text}"""
-                    
-                    response = model.generate_content(prompt)
-                    return response.text.strip()
-                except Exception:
-                    time.sleep(1)
-            
-            return text
+        
+        try:
+            with stage("translation"):
+                response = get_llm_gateway().generate(
+                    prompt, priority=priority, max_output_tokens=estimate_tokens(text)
+                )
+            return response.strip()
         except Exception as e:
             print(f"Translation failed: {e}")
-            return text
+            raise TranslationError(str(e)) from e
 
-    def ensure_translation(self, doc_id: str, content: str, metadata: Dict[str, Any], target_lang: str) -> Dict[str, Any]:
-        """Ensure content and title are available in target language."""
-        if not target_lang or target_lang not in ['zh', 'en']:
-            return {"title": metadata.get("title", ""), "content": content}
+    def _translate_batch(
+        self,
+        entries: List[Dict[str, str]],
+        target_lang: str,
+        priority: Priority = Priority.TRANSLATION,
+    ) -> Dict[str, Dict[str, str]]:
+        """Translate several titles and bodies with one structured Gemini request.
+        
+        Args:
+            entries: Dicts with "id", "title" and "content"
+            target_lang: Target language code
+            priority: LLM gateway admission class
+            
+        Returns:
+            Dict mapping id to {"title", "content"}; entries missing from (or
+            malformed in) the response are translated one by one instead, and
+            entries that still fail are left out
+        """
+        lang_name = 'Chinese (Simplified)' if target_lang == 'zh' else 'English'
+        payload = json.dumps(
+            [{"id": e["id"], "title": e["title"], "content": e["content"]} for e in entries],
+            ensure_ascii=False,
+        )
+        prompt = f"""Task: Translate the "title" and "content" of every item in the JSON array below to {lang_name}.
+Rules:
+1. Maintain professional medical tone.
+2. Keep each "id" unchanged and return every item.
+3. Keep titles under 20 words; keep markdown formatting of content if present.
+4. Output ONLY a JSON array of objects with keys "id", "title", "content".
 
-        title_key = f"title_{target_lang}"
-        content_key = f"content_{target_lang}"
+Items:
+{payload}"""
         
-        cached_title = metadata.get(title_key)
-        cached_content = metadata.get(content_key)
+        translated: Dict[str, Dict[str, str]] = {}
+        try:
+            with stage("translation"):
+                response = get_llm_gateway().generate(
+                    prompt,
+                    priority=priority,
+                    generation_config={"response_mime_type": "application/json"},
+                    max_output_tokens=estimate_tokens(payload),
+                )
+            parsed = json.loads(response)
+            if isinstance(parsed, dict):
+                parsed = parsed.get("items", [])
+            for item in parsed:
+                if (
+                    isinstance(item, dict)
+                    and isinstance(item.get("title"), str)
+                    and isinstance(item.get("content"), str)
+                    and item.get("content").strip()
+                ):
+                    translated[str(item.get("id"))] = {
+                        "title": item["title"].strip(),
+                        "content": item["content"].strip(),
+                    }
+        except Exception as e:
+            print(f"Batch translation failed: {e}")
+        
+        # Per-item fallback for anything the batch did not return cleanly
+        for entry in entries:
+            if entry["id"] not in translated:
+                try:
+                    translated[entry["id"]] = {
+                        "title": self._translate_text(entry["title"], target_lang, is_title=True, priority=priority),
+                        "content": self._translate_text(entry["content"], target_lang, is_title=False, priority=priority),
+                    }
+                except TranslationError:
+                    continue
         
-        updates = {}
+        return {entry["id"]: translated[entry["id"]] for entry in entries if entry["id"] in translated}
+    
+    def _pack_translation_batches(self, entries: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+        """Greedily group entries into batches under the per-request token budget."""
+        batches: List[List[Dict[str, str]]] = []
+        current: List[Dict[str, str]] = []
+        current_tokens = 0
+        for entry in entries:
+            tokens = estimate_tokens(entry["title"]) + estimate_tokens(entry["content"])
+            if current and (
+                current_tokens + tokens > self._translation_batch_tokens
+                or len(current) >= self._translation_batch_items
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(entry)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    @staticmethod
+    def _source_language(content: str, metadata: Dict[str, Any]) -> str:
+        """Language a document is written in (detected for documents stored without one)."""
+        return metadata.get("language") or detect_language(f"{metadata.get('title', '')}\n{content}")
+    
+    def _content_hash(self, content: str, metadata: Dict[str, Any]) -> str:
+        """Source hash translations are validated against."""
+        return metadata.get("content_hash") or content_hash(metadata.get("title", ""), content)
+    
+    def ensure_translation(
+        self,
+        doc_id: str,
+        content: str,
+        metadata: Dict[str, Any],
+        target_lang: str,
+        priority: Priority = Priority.TRANSLATION,
+    ) -> Dict[str, Any]:
+        """Ensure content and title are available in target language.
         
-        if not cached_content:
-            cached_content = self._translate_text(content, target_lang, is_title=False)
-            updates[content_key] = cached_content
+        Raises:
+            TranslationError: If translating failed
+        """
+        with span("ensure_translation", doc_id=doc_id, lang=target_lang):
+            if not target_lang or target_lang not in ['zh', 'en']:
+                return {"title": metadata.get("title", ""), "content": content}
             
-        if not cached_title:
-             current_title = metadata.get("title", "")
-             cached_title = self._translate_text(current_title, target_lang, is_title=True)
-             updates[title_key] = cached_title
-
-        if updates:
-            new_metadata = metadata.copy()
-            new_metadata.update(updates)
-            self._collection.update(ids=[doc_id], metadatas=[new_metadata])
+            # Already written in the target language
+            if self._source_language(content, metadata) == target_lang:
+                return {"title": metadata.get("title", ""), "content": content}
             
-        return {"title": cached_title, "content": cached_content}
-
+            source_hash = self._content_hash(content, metadata)
+            cached = self._translations.get(doc_id, target_lang, source_hash)
+            if cached:
+                return cached
+            
+            # Concurrent requests for the same document share one translation
+            return self._translation_flights.do(
+                (doc_id, target_lang),
+                self._translate_and_store,
+                doc_id,
+                content,
+                metadata,
+                target_lang,
+                source_hash,
+                priority,
+            )
+    
+    def _translate_and_store(
+        self,
+        doc_id: str,
+        content: str,
+        metadata: Dict[str, Any],
+        target_lang: str,
+        source_hash: str,
+        priority: Priority = Priority.TRANSLATION,
+    ) -> Dict[str, str]:
+        """Translate a document and persist the result (single-flight leader)."""
+        # A flight that finished just before ours started may have stored it
+        cached = self._translations.get(doc_id, target_lang, source_hash)
+        if cached:
+            return cached
+        
+        translated_title = self._translate_text(metadata.get("title", ""), target_lang, is_title=True, priority=priority)
+        translated_content = self._translate_text(content, target_lang, is_title=False, priority=priority)
+        self._translations.put(doc_id, target_lang, source_hash, translated_title, translated_content)
+        
+        return {"title": translated_title, "content": translated_content}
+    
+    def get_cached_translations(self, items: List[Dict[str, Any]], target_lang: str) -> Dict[str, Dict[str, str]]:
+        """Look up stored translations for items without translating anything.
+        
+        Returns:
+            Dict mapping item id to {"title", "content"} for items that have one
+        """
+        docs = [
+            (item["id"], self._content_hash(item.get("content", ""), item.get("metadata") or {}))
+            for item in items
+            if item.get("id")
+        ]
+        return self._translations.get_many(docs, target_lang)
+    
+    @staticmethod
+    def _apply_translation(item: Dict[str, Any], translated: Dict[str, str]) -> Dict[str, Any]:
+        """Return a copy of item showing the translated title and content."""
+        new_item = item.copy()
+        new_item["content"] = translated["content"]
+        new_item["metadata"] = {**(item.get("metadata") or {}), "title": translated["title"]}
+        return new_item
+    
+    def apply_cached_translations(
+        self,
+        items: List[Dict[str, Any]],
+        target_lang: str,
+        request_missing: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Swap in stored translations where available (never calls the LLM).
+        
+        Items without one keep their original text; with request_missing,
+        their translation is requested from the background queue, so a
+        later read finds it.
+        """
+        if not target_lang or target_lang not in ['zh', 'en']:
+            return items
+        
+        cached = self.get_cached_translations(items, target_lang)
+        if request_missing:
+            self._translation_queue.request([
+                (item["id"], target_lang)
+                for item in items
+                if item.get("id")
+                and item["id"] not in cached
+                and self._source_language(item.get("content", ""), item.get("metadata") or {}) != target_lang
+            ])
+        return [
+            self._apply_translation(item, cached[item["id"]]) if item.get("id") in cached else item
+            for item in items
+        ]
+    
+    @property
+    def embedder(self) -> Embedder:
+        """Get the embedding provider."""
+        return self._embedder
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the configured provider."""
+        with stage("embedding"):
+            return self._embedder.embed(texts)
+    
+    def warm_up(self):
+        """Load the embedding (and re-rank) models ahead of the first request."""
+        self._embedder.warm_up()
+        if self._rerank_default:
+            self.reranker.warm_up()
     
     @property
     def collection(self):
         """Get the knowledge collection."""
         return self._collection
     
+    @property
+    def lexical_index(self) -> BM25Index:
+        """Get the BM25 index, building it from the collection on first access."""
+        if self._lexical_index is None:
+            with self._lexical_lock:
+                if self._lexical_index is None:
+                    self._lexical_index = self._build_lexical_index()
+        return self._lexical_index
+    
+    @property
+    def _search_collection(self):
+        """Collection searched by queries: chunks when chunking is enabled."""
+        return self._chunks if self._chunking else self._collection
+    
+    def _build_lexical_index(self, page_size: int = 1000) -> BM25Index:
+        """Build a BM25 index over every entry of the searched collection."""
+        index = BM25Index()
+        offset = 0
+        while True:
+            page = self._search_collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["documents", "metadatas"],
+            )
+            if not page["ids"]:
+                break
+            index.add_many(zip(page["ids"], page["documents"], page["metadatas"]))
+            offset += len(page["ids"])
+        return index
+    
+    @property
+    def generation(self) -> int:
+        """Collection generation, incremented on every write through this service."""
+        return self._generation
+    
+    def _bump_generation(self):
+        """Invalidate cached search results after a write."""
+        with self._generation_lock:
+            self._generation += 1
+    
     def _generate_id(self, content: str, source: str) -> str:
         """Generate a unique ID for a document."""
         hash_input = f"{content[:100]}_{source}"
@@ -121,11 +435,7 @@ Original {request_type}:
         """
         doc_id = self._generate_id(content, metadata.get("source", "unknown"))
         
-        self._collection.add(
-            documents=[content],
-            metadatas=[metadata],
-            ids=[doc_id],
-        )
+        self._add([doc_id], [content], [metadata])
         
         return doc_id
     
@@ -148,13 +458,204 @@ Original {request_type}:
             for doc, meta in zip(documents, metadatas)
         ]
         
+        self._add(ids, documents, metadatas)
+        
+        return ids
+    
+    def _add(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ):
+        """Store new documents and update every derived index.
+        
+        Ids already in the collection are skipped (Chroma ignores them
+        anyway), so counters and chunks are never double counted.
+        """
+        existing = set(self._collection.get(ids=list(set(ids)), include=[])["ids"])
+        new_ids, new_docs, new_metas = [], [], []
+        for doc_id, doc, meta in zip(ids, documents, metadatas):
+            if doc_id in existing:
+                continue
+            existing.add(doc_id)
+            new_ids.append(doc_id)
+            new_docs.append(doc)
+            new_metas.append(meta)
+        
+        if not new_ids:
+            return
+        
+        # Record the source hash translations are validated against, and the
+        # source language so pre-warm skips no-op translations
+        new_metas = [
+            {
+                **meta,
+                "content_hash": content_hash(meta.get("title", ""), doc),
+                "language": self._source_language(doc, meta),
+            }
+            for doc, meta in zip(new_docs, new_metas)
+        ]
+        
         self._collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids,
+            documents=new_docs,
+            embeddings=self.embed_texts(new_docs),
+            metadatas=new_metas,
+            ids=new_ids,
         )
+        self._counters.increment(new_metas)
         
-        return ids
+        self._after_add(new_ids, new_docs, new_metas)
+    
+    def _after_add(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ):
+        """Update chunk collection, lexical index, translation queue and cache generation after an add."""
+        if self._prewarm:
+            self.enqueue_translations(ids, metadatas, documents=documents)
+        if self._chunking:
+            chunk_ids, chunk_docs, chunk_metas = self._add_chunks(ids, documents, metadatas)
+            if self._lexical_index is not None:
+                self._lexical_index.add_many(zip(chunk_ids, chunk_docs, chunk_metas))
+        elif self._lexical_index is not None:
+            self._lexical_index.add_many(zip(ids, documents, metadatas))
+        self._bump_generation()
+    
+    @property
+    def translation_queue(self) -> TranslationQueue:
+        return self._translation_queue
+    
+    def enqueue_translations(
+        self,
+        ids: List[str],
+        metadatas: List[Dict[str, Any]],
+        languages: Optional[List[str]] = None,
+        documents: Optional[List[str]] = None,
+    ) -> int:
+        """Queue background translation jobs for documents.
+        
+        Languages a document is already written in are skipped; documents
+        stored without a language are detected from their text.
+        
+        Returns:
+            Number of jobs queued
+        """
+        languages = languages or self._prewarm_languages
+        documents = documents or [""] * len(ids)
+        jobs = [
+            (doc_id, lang)
+            for doc_id, metadata, document in zip(ids, metadatas, documents)
+            for lang in languages
+            if self._source_language(document, metadata or {}) != lang
+        ]
+        return self._translation_queue.enqueue(jobs)
+    
+    def enqueue_all_translations(self, languages: Optional[List[str]] = None, page_size: int = 1000) -> int:
+        """Queue translation jobs for the whole collection (backfill).
+        
+        Returns:
+            Number of jobs queued
+        """
+        queued = 0
+        offset = 0
+        while True:
+            page = self._collection.get(limit=page_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            queued += self.enqueue_translations(page["ids"], page["metadatas"], languages, page["documents"])
+            offset += len(page["ids"])
+        return queued
+    
+    def _add_chunks(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> tuple:
+        """Split documents into passages and store them in the chunk collection."""
+        chunk_ids, chunk_docs, chunk_metas = [], [], []
+        for doc_id, content, metadata in zip(ids, documents, metadatas):
+            for i, chunk in enumerate(chunk_markdown(content, self._chunk_size, self._chunk_overlap)):
+                chunk_ids.append(f"{doc_id}#{i}")
+                chunk_docs.append(chunk)
+                chunk_metas.append({
+                    "parent_id": doc_id,
+                    "chunk_index": i,
+                    "category": metadata.get("category", "general"),
+                    "tier": metadata.get("tier", 4),
+                })
+        
+        if chunk_ids:
+            self._chunks.upsert(
+                ids=chunk_ids,
+                documents=chunk_docs,
+                embeddings=self.embed_texts(chunk_docs),
+                metadatas=chunk_metas,
+            )
+        return chunk_ids, chunk_docs, chunk_metas
+    
+    def rebuild_chunks(self, page_size: int = 500) -> int:
+        """Re-chunk every document into a fresh chunk collection.
+        
+        Returns:
+            Number of chunks written
+        """
+        self._client.delete_collection("health_knowledge_chunks")
+        self._chunks = self._client.get_or_create_collection(
+            name="health_knowledge_chunks",
+            metadata={"description": "Passage chunks of the health knowledge base"},
+        )
+        check_collection_embedding(self._chunks, self._embedder)
+        
+        total = 0
+        offset = 0
+        while True:
+            page = self._collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["documents", "metadatas"],
+            )
+            if not page["ids"]:
+                break
+            chunk_ids, _, _ = self._add_chunks(page["ids"], page["documents"], page["metadatas"])
+            total += len(chunk_ids)
+            offset += len(page["ids"])
+        
+        if self._chunking:
+            self._lexical_index = None
+        self._bump_generation()
+        return total
+    
+    def ensure_chunks(self) -> int:
+        """Build the chunk collection if chunking is on but it is still empty.
+        
+        Returns:
+            Number of chunks written (0 if nothing needed doing)
+        """
+        if self._chunking and self._chunks.count() == 0 and self._collection.count() > 0:
+            return self.rebuild_chunks()
+        return 0
+    
+    def _build_where(
+        self,
+        category: Optional[str] = None,
+        tier: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Build a Chroma where filter from optional category/tier."""
+        conditions = []
+        if category:
+            conditions.append({"category": category})
+        if tier:
+            conditions.append({"tier": tier})
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
     
     def search(
         self,
@@ -162,6 +663,10 @@ Original {request_type}:
         n_results: int = 5,
         category: Optional[str] = None,
         tier: Optional[int] = None,
+        hybrid: Optional[bool] = None,
+        rerank: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+        query_embedding: Optional[List[float]] = None,
     ) -> List[Dict[str, Any]]:
         """Search the knowledge base using semantic search.
         
@@ -170,44 +675,360 @@ Original {request_type}:
             n_results: Maximum number of results
             category: Optional category filter
             tier: Optional authority tier filter
+            hybrid: Fuse BM25 and vector rankings (defaults to settings.hybrid_search)
+            rerank: Re-rank over-fetched candidates with the cross-encoder
+                (defaults to settings.rerank_enabled)
+            mmr: Diversify results with maximal marginal relevance
+                (defaults to settings.mmr_enabled)
+            query_embedding: Precomputed embedding of query, if the caller has one
             
         Returns:
             List of search results with content, metadata, and relevance score
         """
-        # Build where filter
-        where_filter = None
-        if category or tier:
-            conditions = []
-            if category:
-                conditions.append({"category": category})
-            if tier:
-                conditions.append({"tier": tier})
+        with span("search", n_results=n_results, category=category, tier=tier):
+            options = self._resolve_options(hybrid, rerank, mmr)
+            
+            cache_key = self._cache_key(query, n_results, category, tier, options)
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                return self._copy_results(cached)
             
-            if len(conditions) == 1:
-                where_filter = conditions[0]
-            else:
-                where_filter = {"$and": conditions}
+            query_embeddings = [query_embedding] if query_embedding is not None else self.embed_texts([query])
+            candidates = self._search_uncached(
+                [query],
+                self._fetch_size(n_results, options),
+                category,
+                tier,
+                options["hybrid"],
+                query_embeddings=query_embeddings,
+                with_embeddings=options["mmr"],
+            )[0]
+            results, complete = self._post_process(
+                query, query_embeddings[0], candidates, n_results, options
+            )
+            if complete:
+                self._search_cache.set(cache_key, self._copy_results(results))
+            return results
+    
+    def search_many(
+        self,
+        queries: List[Dict[str, Any]],
+        n_results: int = 5,
+        hybrid: Optional[bool] = None,
+        rerank: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for several queries with batched embedding and querying.
         
-        # Execute search
-        results = self._collection.query(
-            query_texts=[query],
-            n_results=n_results,
-            where=where_filter,
-            include=["documents", "metadatas", "distances"],
+        Queries sharing the same category/tier filter are sent to Chroma as a
+        single collection.query call, so they are embedded in one batch.
+        
+        Args:
+            queries: Dicts with "query" and optional "category"/"tier" filters
+            n_results: Maximum number of results per query
+            hybrid: Fuse BM25 and vector rankings (defaults to settings.hybrid_search)
+            rerank: Re-rank with the cross-encoder (defaults to settings.rerank_enabled)
+            mmr: Diversify with maximal marginal relevance (defaults to settings.mmr_enabled)
+            
+        Returns:
+            One result list per query, in input order
+        """
+        with span("search_many", queries=len(queries)):
+            options = self._resolve_options(hybrid, rerank, mmr)
+            
+            all_results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+            
+            # Serve what we can from the cache, group the rest by filter
+            groups: Dict[tuple, List[int]] = {}
+            for i, spec in enumerate(queries):
+                category, tier = spec.get("category"), spec.get("tier")
+                cached = self._search_cache.get(
+                    self._cache_key(spec["query"], n_results, category, tier, options)
+                )
+                if cached is not None:
+                    all_results[i] = self._copy_results(cached)
+                else:
+                    groups.setdefault((category, tier), []).append(i)
+            
+            for (category, tier), indices in groups.items():
+                texts = [queries[i]["query"] for i in indices]
+                query_embeddings = self.embed_texts(texts)
+                group_results = self._search_uncached(
+                    texts,
+                    self._fetch_size(n_results, options),
+                    category,
+                    tier,
+                    options["hybrid"],
+                    query_embeddings=query_embeddings,
+                    with_embeddings=options["mmr"],
+                )
+                for i, query_embedding, candidates in zip(indices, query_embeddings, group_results):
+                    query = queries[i]["query"]
+                    results, complete = self._post_process(
+                        query, query_embedding, candidates, n_results, options
+                    )
+                    if complete:
+                        self._search_cache.set(
+                            self._cache_key(query, n_results, category, tier, options),
+                            self._copy_results(results),
+                        )
+                    all_results[i] = results
+            
+            return all_results
+    
+    def _resolve_options(
+        self,
+        hybrid: Optional[bool],
+        rerank: Optional[bool],
+        mmr: Optional[bool],
+    ) -> Dict[str, Any]:
+        """Fill unset search options from settings."""
+        return {
+            "hybrid": self._hybrid_default if hybrid is None else hybrid,
+            "rerank": self._rerank_default if rerank is None else rerank,
+            "mmr": self._mmr_default if mmr is None else mmr,
+        }
+    
+    def _fetch_size(self, n_results: int, options: Dict[str, Any]) -> int:
+        """Number of candidates to retrieve before post-processing."""
+        fetch = n_results
+        if options["rerank"]:
+            fetch = max(fetch, self._rerank_candidates)
+        if options["mmr"]:
+            fetch = max(fetch, self._mmr_candidates)
+        return fetch
+    
+    def _post_process(
+        self,
+        query: str,
+        query_embedding: List[float],
+        candidates: List[Dict[str, Any]],
+        n_results: int,
+        options: Dict[str, Any],
+    ) -> tuple:
+        """Apply re-ranking stages and cut candidates back to n_results.
+        
+        Returns:
+            (results, complete) where complete is False if a stage fell back
+            because of its time budget (such results are not cached)
+        """
+        complete = True
+        if options["rerank"]:
+            candidates, complete = self.reranker.rerank(query, candidates)
+        
+        if options["mmr"] and len(candidates) > n_results:
+            # Lexical-only hits come back without a stored vector
+            unembedded = [c for c in candidates if c.get("embedding") is None]
+            if unembedded:
+                for c, vector in zip(unembedded, self.embed_texts([c["content"] for c in unembedded])):
+                    c["embedding"] = vector
+            selected = mmr_select(
+                query_embedding,
+                [c["embedding"] for c in candidates],
+                k=n_results,
+                lambda_mult=self._mmr_lambda,
+            )
+            candidates = [candidates[i] for i in selected]
+        
+        results = candidates[:n_results]
+        for result in results:
+            result.pop("embedding", None)
+        return results, complete
+    
+    @property
+    def reranker(self) -> CrossEncoderReranker:
+        """Get the cross-encoder re-ranker (model loads on first use)."""
+        if self._reranker is None:
+            settings = get_settings()
+            self._reranker = CrossEncoderReranker(
+                model_name=settings.rerank_model,
+                batch_size=settings.rerank_batch_size,
+                budget_ms=settings.rerank_budget_ms,
+            )
+        return self._reranker
+    
+    def _cache_key(
+        self,
+        query: str,
+        n_results: int,
+        category: Optional[str],
+        tier: Optional[int],
+        options: Dict[str, Any],
+    ) -> tuple:
+        """Build a search cache key from the normalized query, filters and options."""
+        return (
+            " ".join(query.lower().split()),
+            n_results,
+            category,
+            tier,
+            tuple(sorted(options.items())),
+            self._generation,
         )
+    
+    @staticmethod
+    def _copy_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copy results so callers can mutate them without touching the cache."""
+        return [{**result, "metadata": dict(result.get("metadata") or {})} for result in results]
+    
+    def _search_uncached(
+        self,
+        queries: List[str],
+        n_results: int,
+        category: Optional[str],
+        tier: Optional[int],
+        hybrid: bool,
+        query_embeddings: Optional[List[List[float]]] = None,
+        with_embeddings: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        """Run one vector query (and optional lexical fusion) for queries sharing a filter.
         
-        # Format results
-        formatted_results = []
-        if results["documents"] and results["documents"][0]:
-            for i, doc in enumerate(results["documents"][0]):
-                result = {
-                    "content": doc,
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                    "relevance_score": 1 - (results["distances"][0][i] if results["distances"] else 0),
+        With with_embeddings, each result carries its stored vector under
+        "embedding" for downstream diversification.
+        """
+        collection = self._search_collection
+        include = ["documents", "metadatas", "distances"]
+        if with_embeddings:
+            include.append("embeddings")
+        
+        # Over-fetch candidates for fusion, then cut back to n_results; at
+        # passage level several hits may belong to the same parent document
+        n_candidates = n_results * 2 if hybrid else n_results
+        if self._chunking:
+            n_candidates *= self._max_passages + 1
+        
+        # Execute search
+        query_embeddings = query_embeddings or self.embed_texts(queries)
+        with stage("vector_query"):
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_candidates,
+                where=self._build_where(category, tier),
+                include=include,
+            )
+        
+        all_results = []
+        for q, query in enumerate(queries):
+            # Format results
+            formatted_results = []
+            if results["documents"] and results["documents"][q]:
+                for i, doc in enumerate(results["documents"][q]):
+                    result = {
+                        "id": results["ids"][q][i],
+                        "content": doc,
+                        "metadata": results["metadatas"][q][i] if results["metadatas"] else {},
+                        "relevance_score": 1 - (results["distances"][q][i] if results["distances"] else 0),
+                    }
+                    if with_embeddings:
+                        result["embedding"] = results["embeddings"][q][i]
+                    formatted_results.append(result)
+            
+            if hybrid:
+                lexical_hits = self.lexical_index.search(
+                    query, n_results=n_candidates, category=category, tier=tier
+                )
+                formatted_results = self._fuse_results(collection, formatted_results, lexical_hits, n_candidates)
+            
+            if self._chunking:
+                formatted_results = self._group_passages(formatted_results)
+            
+            all_results.append(formatted_results[:n_results])
+        
+        return all_results
+    
+    def _fuse_results(
+        self,
+        collection,
+        vector_results: List[Dict[str, Any]],
+        lexical_hits: List[tuple],
+        n_results: int,
+    ) -> List[Dict[str, Any]]:
+        """Combine vector results and BM25 hits with reciprocal-rank fusion.
+        
+        relevance_score becomes the higher of the vector similarity and the
+        normalized fusion score, so a hit found only by BM25 is not weighted
+        as irrelevant by confidence and context packing; the original
+        similarity is kept as vector_score.
+        """
+        by_id = {result["id"]: result for result in vector_results}
+        lexical_scores = dict(lexical_hits)
+        
+        fused = reciprocal_rank_fusion(
+            [[result["id"] for result in vector_results], [doc_id for doc_id, _ in lexical_hits]],
+            k=self._rrf_k,
+        )[:n_results]
+        
+        # Lexical-only hits were not returned by the vector query; fetch them
+        missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+        if missing:
+            fetched = collection.get(ids=missing, include=["documents", "metadatas"])
+            for i, doc_id in enumerate(fetched["ids"]):
+                by_id[doc_id] = {
+                    "id": doc_id,
+                    "content": fetched["documents"][i],
+                    "metadata": fetched["metadatas"][i] if fetched["metadatas"] else {},
+                    "relevance_score": 0.0,
                 }
-                formatted_results.append(result)
         
-        return formatted_results
+        fused_results = []
+        for doc_id, score in fused:
+            if doc_id not in by_id:
+                continue
+            result = by_id[doc_id]
+            result["lexical_score"] = lexical_scores.get(doc_id, 0.0)
+            result["fusion_score"] = score
+            result["vector_score"] = result["relevance_score"]
+            result["relevance_score"] = max(result["relevance_score"], normalize_rrf(score, 2, self._rrf_k))
+            fused_results.append(result)
+        
+        return fused_results
+    
+    def _group_passages(self, passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group ranked passage hits by parent document.
+        
+        Parents keep the rank of their best passage; each parent's content is
+        its best passages (up to max_passages_per_document) in document order.
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for passage in passages:
+            parent_id = passage["metadata"].get("parent_id", passage["id"])
+            group = groups.setdefault(parent_id, [])
+            if len(group) < self._max_passages:
+                group.append(passage)
+        
+        if not groups:
+            return []
+        
+        parents = self._collection.get(ids=list(groups), include=["metadatas"])
+        parent_meta = dict(zip(parents["ids"], parents["metadatas"] or []))
+        
+        grouped = []
+        for parent_id, group in groups.items():
+            if parent_id not in parent_meta:
+                continue  # Orphaned chunk of a deleted document
+            best = group[0]
+            ordered = sorted(group, key=lambda p: p["metadata"].get("chunk_index", 0))
+            result = {
+                "id": parent_id,
+                "content": "\n\n...\n\n".join(p["content"] for p in ordered),
+                "metadata": parent_meta[parent_id] or {},
+                "relevance_score": best["relevance_score"],
+                "passages": [
+                    {
+                        "chunk_index": p["metadata"].get("chunk_index", 0),
+                        "content": p["content"],
+                        "relevance_score": p["relevance_score"],
+                    }
+                    for p in group
+                ],
+            }
+            if "fusion_score" in best:
+                result["lexical_score"] = best["lexical_score"]
+                result["fusion_score"] = best["fusion_score"]
+            if "embedding" in best:
+                result["embedding"] = best["embedding"]
+            grouped.append(result)
+        
+        return grouped
     
     def get_all_by_category(
         self,
@@ -232,71 +1053,270 @@ Original {request_type}:
         
         return items
     
+    def browse(
+        self,
+        category: Optional[str] = None,
+        tier: Optional[int] = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Dict[str, Any]:
+        """Get a page of documents with optional category/tier filters.
+        
+        Returns:
+            Dict with the page "items" and the "total" number of matches
+        """
+        # Filters and pagination are pushed down into Chroma, and the total
+        # comes from the counter index, so cost does not grow with page depth
+        results = self._collection.get(
+            where=self._build_where(category, tier),
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            include=["documents", "metadatas"],
+        )
+        
+        items = []
+        if results["documents"]:
+            for i, doc in enumerate(results["documents"]):
+                items.append({
+                    "id": results["ids"][i],
+                    "content": doc,
+                    "metadata": results["metadatas"][i] if results["metadatas"] else {},
+                })
+        
+        return {
+            "items": items,
+            "total": self._counters.count(category, tier),
+        }
+    
     def get_category_counts(self) -> Dict[str, int]:
-        """Get count of documents per category."""
-        # Get all metadata
-        result = self._collection.get(include=["metadatas"])
-        
-        counts = {}
-        if result["metadatas"]:
-            for meta in result["metadatas"]:
-                cat = meta.get("category", "uncategorized")
-                counts[cat] = counts.get(cat, 0) + 1
-                
-        return counts
+        """Get count of documents per category (from the counter index)."""
+        return self._counters.category_counts()
+    
+    def rebuild_counters(self) -> int:
+        """Recount documents per category/tier from the collection.
+        
+        Returns:
+            Total number of documents counted
+        """
+        return self._counters.rebuild(self._collection)
+    
+    def ensure_counters(self) -> int:
+        """Rebuild the counter index if it disagrees with the collection size.
+        
+        Returns:
+            Number of documents counted (0 if the index was already consistent)
+        """
+        if self._counters.count() != self._collection.count():
+            return self.rebuild_counters()
+        return 0
 
-    def batch_ensure_translations(self, items: List[Dict[str, Any]], target_lang: str) -> List[Dict[str, Any]]:
-        """Ensure translations for a list of items concurrently."""
-        if not target_lang or target_lang not in ['zh', 'en']:
-            return items
+    def batch_ensure_translations(
+        self,
+        items: List[Dict[str, Any]],
+        target_lang: str,
+        priority: Priority = Priority.TRANSLATION,
+        raise_errors: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Ensure translations for a list of items concurrently.
+        
+        Items whose translation failed keep their original text, or, with
+        raise_errors, a TranslationError is raised once the rest are done.
+        """
+        with span("batch_ensure_translations", items=len(items), lang=target_lang):
+            if not target_lang or target_lang not in ['zh', 'en']:
+                return items
 
-        # Identify items needing translation
-        to_translate = []
-        for i, item in enumerate(items):
-            metadata = item.get("metadata", {})
-            title_key = f"title_{target_lang}"
-            content_key = f"content_{target_lang}"
-            
-            if not metadata.get(title_key) or not metadata.get(content_key):
-                to_translate.append((i, item))
+            # Serve stored translations, collect the rest
+            cached = self.get_cached_translations(items, target_lang)
+            result_items = list(items)
+            to_translate = []
+            for i, item in enumerate(items):
+                if self._source_language(item.get("content", ""), item.get("metadata") or {}) == target_lang:
+                    continue
+                if item.get("id") in cached:
+                    result_items[i] = self._apply_translation(item, cached[item["id"]])
+                else:
+                    to_translate.append((i, item))
 
-        if not to_translate:
-            return items
+            if not to_translate:
+                return result_items
 
-        # Define translation task
-        def process_item(idx_item):
-            idx, item = idx_item
-            doc_id = item.get("id")
-            content = item.get("content", "")
-            metadata = item.get("metadata", {})
+            if self._translation_batching:
+                return self._batch_translate_items(result_items, to_translate, target_lang, priority, raise_errors)
+
+            # Define translation task
+            def process_item(idx_item):
+                idx, item = idx_item
             
-            # This updates DB and returns translated content
-            translated = self.ensure_translation(doc_id, content, metadata, target_lang)
+                # This stores and returns the translation
+                try:
+                    translated = self.ensure_translation(
+                        item.get("id"), item.get("content", ""), item.get("metadata", {}), target_lang, priority
+                    )
+                except TranslationError:
+                    return idx, None
+                return idx, self._apply_translation(item, translated)
+
+            # Execute concurrently
+            # Limit max workers to avoid rate limits
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                results = list(executor.map(bind(process_item), to_translate))
+
+            # Merge results back
+            failed = 0
+            for idx, new_item in results:
+                if new_item is None:
+                    failed += 1
+                else:
+                    result_items[idx] = new_item
+            if failed and raise_errors:
+                raise TranslationError(f"{failed} of {len(to_translate)} translations to {target_lang} failed")
             
-            # Update item in memory
-            new_item = item.copy()
-            new_item["content"] = translated["content"]
-            new_metadata = metadata.copy()
-            new_metadata[f"title_{target_lang}"] = translated["title"]
-            new_metadata[f"content_{target_lang}"] = translated["content"]
-            new_metadata["title"] = translated["title"] # Update display title
-            new_item["metadata"] = new_metadata
-            return idx, new_item
+            return result_items
 
-        # Execute concurrently
+    def _batch_translate_items(
+        self,
+        result_items: List[Dict[str, Any]],
+        to_translate: List[tuple],
+        target_lang: str,
+        priority: Priority = Priority.TRANSLATION,
+        raise_errors: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Translate items with packed multi-document requests and store the results."""
+        # The same document may appear more than once; translate it once
+        by_id: Dict[str, List[int]] = {}
+        entries = []
+        for idx, item in to_translate:
+            doc_id = item.get("id")
+            if doc_id not in by_id:
+                entries.append({
+                    "id": doc_id,
+                    "title": (item.get("metadata") or {}).get("title", ""),
+                    "content": item.get("content", ""),
+                })
+            by_id.setdefault(doc_id, []).append(idx)
+        
+        # Lead the flights nobody else is running; wait on the others
+        led, joined = [], []
+        for entry in entries:
+            future, leader = self._translation_flights.begin((entry["id"], target_lang))
+            entry["flight"] = future
+            (led if leader else joined).append(entry)
+        
+        def process_batch(batch):
+            finished = set()
+            try:
+                translated = self._translate_batch(batch, target_lang, priority)
+                for entry in batch:
+                    result = translated.get(entry["id"])
+                    if result is None:
+                        # Store nothing, so the translation is retried later
+                        error = TranslationError(f"Translation of {entry['id']} failed")
+                        self._translation_flights.finish((entry["id"], target_lang), entry["flight"], error=error)
+                        finished.add(entry["id"])
+                        continue
+                    metadata = result_items[by_id[entry["id"]][0]].get("metadata") or {}
+                    self._translations.put(
+                        entry["id"],
+                        target_lang,
+                        self._content_hash(entry["content"], metadata),
+                        result["title"],
+                        result["content"],
+                    )
+                    self._translation_flights.finish((entry["id"], target_lang), entry["flight"], result=result)
+                    finished.add(entry["id"])
+                return translated
+            except BaseException as e:
+                # Every led flight must finish (e.g. when put() hits a locked
+                # database), or requests joined on it would wait forever
+                for entry in batch:
+                    if entry["id"] not in finished:
+                        self._translation_flights.finish((entry["id"], target_lang), entry["flight"], error=e)
+                raise
+        
         # Limit max workers to avoid rate limits
         with ThreadPoolExecutor(max_workers=5) as executor:
-            results = list(executor.map(process_item, to_translate))
+            batch_results = list(executor.map(bind(process_batch), self._pack_translation_batches(led)))
+        
+        translated_all: Dict[str, Dict[str, str]] = {}
+        for translated in batch_results:
+            translated_all.update(translated)
+        for entry in joined:
+            try:
+                translated_all[entry["id"]] = entry["flight"].result()
+            except TranslationError:
+                pass
+        
+        for doc_id, result in translated_all.items():
+            for idx in by_id[doc_id]:
+                result_items[idx] = self._apply_translation(result_items[idx], result)
+        
+        failed = len(entries) - len(translated_all)
+        if failed and raise_errors:
+            raise TranslationError(f"{failed} of {len(entries)} translations to {target_lang} failed")
+        return result_items
 
-        # Merge results back
-        result_items = list(items)
-        for idx, new_item in results:
-            result_items[idx] = new_item
+    def migrate_legacy_translations(self, page_size: int = 200) -> int:
+        """Move translations cached in Chroma metadata into the translation store.
+        
+        Legacy title_*/content_* fields are removed from the metadata and a
+        content_hash is recorded for each document.
+        
+        Returns:
+            Number of translations moved
+        """
+        legacy_keys = [f"{field}_{lang}" for field in ("title", "content") for lang in ("zh", "en")]
+        moved = 0
+        offset = 0
+        while True:
+            page = self._collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["documents", "metadatas"],
+            )
+            if not page["ids"]:
+                break
             
-        return result_items
+            updates = []
+            for doc_id, content, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                metadata = metadata or {}
+                source_hash = content_hash(metadata.get("title", ""), content)
+                for lang in ("zh", "en"):
+                    title = metadata.get(f"title_{lang}")
+                    translated = metadata.get(f"content_{lang}")
+                    if title and translated:
+                        self._translations.put(doc_id, lang, source_hash, title, translated)
+                        moved += 1
+                
+                update = {key: None for key in legacy_keys if key in metadata}
+                if update or metadata.get("content_hash") != source_hash:
+                    update["content_hash"] = source_hash
+                    updates.append((doc_id, update))
+            
+            if updates:
+                self._collection.update(
+                    ids=[doc_id for doc_id, _ in updates],
+                    metadatas=[update for _, update in updates],
+                )
+            offset += len(page["ids"])
+        
+        self._bump_generation()
+        return moved
 
+    def get_documents(self, doc_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several documents by ID (untranslated); missing ids are skipped."""
+        results = self._collection.get(ids=doc_ids, include=["documents", "metadatas"])
+        return [
+            {"id": doc_id, "content": content, "metadata": metadata or {}}
+            for doc_id, content, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+    
     def get_document(self, doc_id: str, lang: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Get a specific document by ID, optionally translated."""
+        """Get a specific document by ID, with its stored translation into lang if any.
+        
+        A missing translation is requested from the background queue; the
+        original text is returned meanwhile.
+        """
         results = self._collection.get(
             ids=[doc_id],
             include=["documents", "metadatas"],
@@ -306,20 +1326,14 @@ Original {request_type}:
             content = results["documents"][0]
             metadata = results["metadatas"][0] if results["metadatas"] else {}
             
-            # Handle translation if requested
-            if lang and lang in ['zh', 'en']:
-                translated = self.ensure_translation(doc_id, content, metadata, lang)
-                return {
-                    "id": doc_id,
-                    "content": translated["content"],
-                    "metadata": {**metadata, "title": translated["title"]},
-                }
-
-            return {
+            item = {
                 "id": doc_id,
                 "content": content,
                 "metadata": metadata,
             }
+            if lang:
+                return self.apply_cached_translations([item], lang, request_missing=True)[0]
+            return item
         
         return None
     
@@ -329,12 +1343,36 @@ Original {request_type}:
         return {
             "total_documents": count,
             "collection_name": self._collection.name,
+            "total_chunks": self._chunks.count(),
+            "chunking_enabled": self._chunking,
+            "generation": self._generation,
+            "translations": self._translations.counts(),
+            "translation_flights": self._translation_flights.stats(),
+            "translation_queue": self._translation_queue.stats(),
+            "search_cache": self._search_cache.stats(),
         }
     
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document by ID."""
         try:
+            existing = self._collection.get(ids=[doc_id], include=["metadatas"])
+            if not existing["ids"]:
+                return False
+            
             self._collection.delete(ids=[doc_id])
+            self._counters.decrement(existing["metadatas"])
+            self._translations.delete(doc_id)
+            self._translation_queue.delete(doc_id)
+            get_answer_cache().invalidate_documents([doc_id])
+            
+            chunk_ids = self._chunks.get(where={"parent_id": doc_id}, include=[])["ids"]
+            if chunk_ids:
+                self._chunks.delete(ids=chunk_ids)
+            
+            if self._lexical_index is not None:
+                for entry_id in (chunk_ids if self._chunking else [doc_id]):
+                    self._lexical_index.remove(entry_id)
+            self._bump_generation()
             return True
         except Exception:
             return False
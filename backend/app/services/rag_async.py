@@ -0,0 +1,224 @@
+"""Async facade over RAGService.
+
+ChromaDB is blocking, so the async routers must not call RAGService
+directly: one slow query would stall the whole event loop. This facade
+dispatches every call onto a dedicated, size-limited thread pool and tracks
+queue depth. None of these calls wait on the LLM: read paths serve stored
+translations and leave misses to the background translation queue.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import get_settings
+from app.services.rag import RAGService, get_rag_service
+
+
+class RAGOverloadedError(Exception):
+    """Raised when the RAG executor queue is full."""
+
+
+class _BoundedExecutor:
+    """Thread pool with a bounded queue and queue-depth metrics."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._queued = 0
+        self._running = 0
+        self._max_queued_seen = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Dispatch a blocking call onto the executor and await its result."""
+        with self._lock:
+            if self._queued >= self._max_queue:
+                self._rejected += 1
+                raise RAGOverloadedError("Knowledge base is busy, please retry later.")
+            self._queued += 1
+            self._max_queued_seen = max(self._max_queued_seen, self._queued)
+
+        submitted_at = time.monotonic()
+        # "started" once a worker picks the call up, "abandoned" if the caller gave up first
+        state = {"started": False, "abandoned": False}
+
+        def call():
+            with self._lock:
+                if state["abandoned"]:
+                    raise asyncio.CancelledError()
+                state["started"] = True
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += time.monotonic() - submitted_at
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        # Run in a copy of the caller's context so request trace spans follow the call
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self._executor, context.run, call)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        except BaseException:
+            # Cancelled (client disconnect, timeout) while the call was still
+            # queued: it will never run, so it no longer counts as queued
+            with self._lock:
+                if not state["started"]:
+                    state["abandoned"] = True
+                    self._queued -= 1
+            raise
+
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue-depth metrics."""
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            return {
+                "max_workers": self._max_workers,
+                "max_queue": self._max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued_seen": self._max_queued_seen,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": (self._total_wait / started * 1000) if started else 0.0,
+            }
+
+    def shutdown(self):
+        """Stop the executor, waiting for in-flight calls."""
+        self._executor.shutdown(wait=True)
+
+
+class AsyncRAGService:
+    """Runs RAGService calls on a bounded executor without blocking the event loop."""
+
+    def __init__(self, rag: RAGService, max_workers: int = 8, max_queue: int = 256):
+        self._rag = rag
+        self._pool = _BoundedExecutor("rag", max_workers, max_queue)
+
+    @property
+    def rag(self) -> RAGService:
+        """Get the underlying synchronous service."""
+        return self._rag
+
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        return await self._pool.run(fn, *args, **kwargs)
+
+    async def asearch(
+        self,
+        query: str,
+        n_results: int = 5,
+        category: Optional[str] = None,
+        tier: Optional[int] = None,
+        hybrid: Optional[bool] = None,
+        rerank: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Async RAGService.search."""
+        return await self._run(
+            self._rag.search, query, n_results, category, tier, hybrid, rerank, mmr, query_embedding
+        )
+
+    async def asearch_many(
+        self,
+        queries: List[Dict[str, Any]],
+        n_results: int = 5,
+        hybrid: Optional[bool] = None,
+        rerank: Optional[bool] = None,
+        mmr: Optional[bool] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Async RAGService.search_many."""
+        return await self._run(self._rag.search_many, queries, n_results, hybrid, rerank, mmr)
+
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Async RAGService.embed_texts."""
+        return await self._run(self._rag.embed_texts, texts)
+
+    async def abrowse(
+        self,
+        category: Optional[str] = None,
+        tier: Optional[int] = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Dict[str, Any]:
+        """Async RAGService.browse."""
+        return await self._run(self._rag.browse, category, tier, page, page_size)
+
+    async def aget_document(self, doc_id: str, lang: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Async RAGService.get_document."""
+        return await self._run(self._rag.get_document, doc_id, lang)
+
+    async def aget_category_counts(self) -> Dict[str, int]:
+        """Async RAGService.get_category_counts."""
+        return await self._run(self._rag.get_category_counts)
+
+    async def aapply_cached_translations(
+        self,
+        items: List[Dict[str, Any]],
+        target_lang: str,
+        request_missing: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Async RAGService.apply_cached_translations."""
+        return await self._run(self._rag.apply_cached_translations, items, target_lang, request_missing)
+
+    async def aadd_document(self, content: str, metadata: Dict[str, Any]) -> str:
+        """Async RAGService.add_document."""
+        return await self._run(self._rag.add_document, content, metadata)
+
+    async def aget_stats(self) -> Dict[str, Any]:
+        """Async RAGService.get_stats."""
+        return await self._run(self._rag.get_stats)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get executor queue-depth metrics."""
+        return self._pool.stats()
+
+    def shutdown(self):
+        """Stop the executor, waiting for in-flight calls."""
+        self._pool.shutdown()
+
+
+# Singleton instance
+_async_rag_service: Optional[AsyncRAGService] = None
+
+
+def get_async_rag_service() -> AsyncRAGService:
+    """Get the async RAG facade singleton."""
+    global _async_rag_service
+    if _async_rag_service is None:
+        settings = get_settings()
+        _async_rag_service = AsyncRAGService(
+            get_rag_service(),
+            max_workers=settings.rag_max_workers,
+            max_queue=settings.rag_max_queue,
+        )
+    return _async_rag_service
+
+
+def shutdown_async_rag_service():
+    """Shut down the facade's executor and drop the singleton."""
+    global _async_rag_service
+    if _async_rag_service is not None:
+        _async_rag_service.shutdown()
+        _async_rag_service = None
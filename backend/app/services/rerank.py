@@ -0,0 +1,140 @@
+"""Post-retrieval re-ranking stages."""
+import math
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class CrossEncoderReranker:
+    """Re-score retrieved passages with a local cross-encoder on CPU.
+
+    Candidates are scored in batches, best vector rank first. If the time
+    budget runs out, the passages scored so far are re-ordered and the rest
+    keep their vector order after them. Scored results carry rerank_score;
+    every result carries rerank_complete.
+
+    Args:
+        model_name: sentence-transformers CrossEncoder model id or path
+        batch_size: (query, passage) pairs per forward pass
+        budget_ms: Per-request scoring budget in milliseconds
+        max_chars: Passage characters fed to the model (it truncates anyway)
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 16,
+        budget_ms: float = 200.0,
+        max_chars: int = 2000,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.max_chars = max_chars
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def warm_up(self):
+        """Load the model and score one pair."""
+        self.model.predict([("warm up", "warm up")], show_progress_bar=False)
+
+    def rerank(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Re-order results by cross-encoder score within the time budget.
+
+        Returns:
+            (re-ordered results, whether every candidate was scored)
+        """
+        if not results:
+            return results, True
+
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        scored = 0
+        for start in range(0, len(results), self.batch_size):
+            if time.perf_counter() >= deadline:
+                break
+            batch = results[start:start + self.batch_size]
+            scores = self.model.predict(
+                [(query, result.get("content", "")[:self.max_chars]) for result in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+            for result, score in zip(batch, scores):
+                result["rerank_score"] = float(score)
+            scored += len(batch)
+
+        complete = scored == len(results)
+        for result in results:
+            result["rerank_complete"] = complete
+        head = sorted(results[:scored], key=lambda r: r["rerank_score"], reverse=True)
+        return head + results[scored:], complete
+
+
+def result_score(result: Dict[str, Any]) -> float:
+    """Relevance of a search result in [0, 1] for confidence and weighting.
+
+    Re-ranked results use the cross-encoder score (a logit, mapped through a
+    sigmoid), since it decided their order; others use relevance_score.
+    """
+    if "rerank_score" in result:
+        return 1.0 / (1.0 + math.exp(-max(min(result["rerank_score"], 50.0), -50.0)))
+    return result.get("relevance_score", 0.0)
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """Pick a relevant but diverse subset with maximal marginal relevance.
+
+    Args:
+        query_embedding: Query vector
+        embeddings: Candidate vectors
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity
+
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    if len(embeddings) == 0:
+        return []
+
+    docs = np.array(embeddings, dtype=np.float32)
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True) + 1e-12
+    query = np.array(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) + 1e-12
+
+    relevance = docs @ query
+    similarity = docs @ docs.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of each candidate to anything already selected
+    max_similarity = similarity[selected[0]].copy()
+    chosen = np.zeros(len(docs), dtype=bool)
+    chosen[selected[0]] = True
+
+    while len(selected) < min(k, len(docs)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[chosen] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        chosen[best] = True
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+    return selected
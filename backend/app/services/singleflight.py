@@ -0,0 +1,65 @@
+"""Single-flight de-duplication of concurrent work.
+
+When several callers ask for the same key at once, only the first (the
+leader) does the work; the others wait for the leader's result, a
+thread-safe concurrent.futures.Future.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by an arbitrary hashable key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.led = 0
+        self.shared = 0
+
+    def begin(self, key: Hashable) -> Tuple[Future, bool]:
+        """Join the flight for key, starting one if none is running.
+
+        Returns:
+            (future, is_leader). A leader must call finish() exactly once.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.led += 1
+            return future, True
+
+    def finish(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None):
+        """Publish the leader's result (or error) to waiters and close the flight."""
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn once per concurrent key from threads; others get its result."""
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result=result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Get flight counters."""
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"in_flight": in_flight, "led": self.led, "shared": self.shared}
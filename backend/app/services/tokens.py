@@ -0,0 +1,32 @@
+"""Cheap token-count estimates for prompt budgeting.
+
+Gemini's tokenizer is not available offline, so budgets use a heuristic:
+CJK characters are roughly one token each, other text roughly four
+characters per token. This errs on the high side for Chinese. The same
+character classes tell Chinese from English text.
+"""
+import re
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+_LATIN_RE = re.compile(r"[A-Za-z]")
+
+# CJK share above which text counts as Chinese (four Latin letters count as one)
+CJK_RATIO = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in text."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def detect_language(text: str, sample: int = 2000) -> str:
+    """Guess whether text is Chinese ("zh") or English ("en") from its first characters."""
+    text = (text or "")[:sample]
+    cjk = len(_CJK_RE.findall(text))
+    latin = len(_LATIN_RE.findall(text))
+    if not cjk + latin:
+        return "en"
+    return "zh" if cjk / (cjk + latin / 4) >= CJK_RATIO else "en"
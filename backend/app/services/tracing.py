@@ -0,0 +1,211 @@
+"""Per-request span tracing.
+
+The HTTP middleware starts a trace for each request; code on the request
+path opens spans with `with span("name"):`. The current span lives in a
+context variable, so it follows the request across awaits and into the
+RAG executor (which runs calls in a copy of the caller's context). Worker
+pools started inside a request wrap their task function with bind().
+
+A finished trace is summarised in a Server-Timing header (time per span
+name, summed over repeated spans) and, when slower than a threshold,
+written with its full span tree to a JSON-lines slow log.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class Span:
+    """A timed operation with child spans."""
+
+    __slots__ = ("name", "start", "end", "attributes", "children", "_trace")
+
+    def __init__(self, name: str, trace: "Trace", start: Optional[float] = None, **attributes: Any):
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.children: List["Span"] = []
+        self._trace = trace
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (or to now while open)."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def child(self, name: str, start: Optional[float] = None, **attributes: Any) -> "Span":
+        """Open a child span (thread-safe: workers may add children concurrently)."""
+        span = Span(name, self._trace, start, **attributes)
+        with self._trace.lock:
+            self.children.append(span)
+        return span
+
+    def finish(self, end: Optional[float] = None):
+        self.end = time.perf_counter() if end is None else end
+
+    def find(self, name: str) -> Optional["Span"]:
+        """Last direct child called name."""
+        with self._trace.lock:
+            for span in reversed(self.children):
+                if span.name == name:
+                    return span
+        return None
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        """Span tree with times in milliseconds relative to origin."""
+        with self._trace.lock:
+            children = list(self.children)
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if children:
+            data["children"] = [child.to_dict(origin) for child in children]
+        return data
+
+
+class Trace:
+    """Span tree of one request."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.lock = threading.Lock()
+        self.root = Span(name, self, **attributes)
+
+    def totals(self) -> Dict[str, List[float]]:
+        """{span name: [total seconds, count]} over every span below the root."""
+        totals: Dict[str, List[float]] = {}
+        stack = [self.root]
+        while stack:
+            span = stack.pop()
+            with self.lock:
+                children = list(span.children)
+            for child in children:
+                entry = totals.setdefault(child.name, [0.0, 0])
+                entry[0] += child.duration
+                entry[1] += 1
+                stack.append(child)
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per span name, then the total.
+
+        Nested spans are counted in their parents too, and spans that ran
+        in parallel are summed, so the metrics need not add up to total.
+        """
+        metrics = []
+        for name, (seconds, count) in sorted(self.totals().items(), key=lambda item: -item[1][0]):
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            metrics.append(entry)
+        metrics.append(f"total;dur={self.root.duration * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.root.to_dict(self.root.start)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Innermost open span of the current request, if it is traced."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Trace the with-block as the root span of a request."""
+    trace = Trace(name, **attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.finish()
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time the with-block as a child of the current span (no-op outside a trace)."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, **attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+def bind(fn: Callable) -> Callable:
+    """Make fn record its spans under the current span when run on another thread."""
+    parent = _current_span.get()
+    if parent is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+
+    return run
+
+
+class SlowRequestLog:
+    """Appends traces of requests slower than a threshold as JSON lines.
+
+    Args:
+        path: Log file, created if missing
+        threshold_ms: Minimum request duration to log (0 logs everything)
+    """
+
+    def __init__(self, path: str, threshold_ms: float = 1000.0):
+        self.path = Path(path)
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+
+    def maybe_write(self, trace: Trace, **fields: Any) -> bool:
+        """Write trace if it was slow enough; returns whether it was written."""
+        duration_ms = trace.root.duration * 1000
+        if duration_ms < self.threshold_ms:
+            return False
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_ms": round(duration_ms, 3),
+            **fields,
+            "spans": trace.to_dict(),
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return True
+
+
+# Singleton instance
+_slow_request_log: Optional[SlowRequestLog] = None
+
+
+def get_slow_request_log() -> SlowRequestLog:
+    """Get the slow request log singleton."""
+    global _slow_request_log
+    if _slow_request_log is None:
+        from app.config import get_settings
+
+        settings = get_settings()
+        _slow_request_log = SlowRequestLog(settings.slow_request_log, settings.slow_request_ms)
+    return _slow_request_log
@@ -0,0 +1,314 @@
+"""Background translation pre-warming.
+
+Documents are enqueued as (doc_id, lang) jobs when they are added, and a
+small worker pool drains the queue under a rate limit, so read paths find
+translations already stored instead of calling the LLM. A read that misses
+requests the job, which moves it ahead of the ingest backlog. The queue
+lives in the application database and survives restarts.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.db import connect
+from app.services.llm_gateway import Priority
+
+
+class TranslationQueue:
+    """Persistent (doc_id, lang) job queue in SQLite."""
+
+    def __init__(self, db_path: Optional[Path] = None, max_attempts: int = 3):
+        self._db_path = db_path
+        self.max_attempts = max_attempts
+        with connect(self._db_path) as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS translation_jobs (
+                    doc_id TEXT NOT NULL,
+                    lang TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    enqueued_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    requested INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (doc_id, lang)
+                )"""
+            )
+            # Tables created before jobs could be requested by readers
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(translation_jobs)")}
+            if "requested" not in columns:
+                conn.execute("ALTER TABLE translation_jobs ADD COLUMN requested INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translation_jobs_status "
+                "ON translation_jobs (status, enqueued_at)"
+            )
+
+    def enqueue(self, jobs: Iterable[Tuple[str, str]]) -> int:
+        """Queue (doc_id, lang) jobs; finished or failed jobs are re-queued.
+
+        Returns:
+            Number of jobs submitted
+        """
+        now = time.time()
+        rows = [(doc_id, lang, now, now) for doc_id, lang in jobs]
+        if not rows:
+            return 0
+        with connect(self._db_path) as conn:
+            conn.executemany(
+                """INSERT INTO translation_jobs (doc_id, lang, enqueued_at, updated_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT (doc_id, lang) DO UPDATE SET
+                       status = 'pending', attempts = 0, error = NULL,
+                       enqueued_at = excluded.enqueued_at, updated_at = excluded.updated_at
+                   WHERE status IN ('done', 'failed')""",
+                rows,
+            )
+        return len(rows)
+
+    def request(self, jobs: Iterable[Tuple[str, str]]) -> int:
+        """Queue (doc_id, lang) jobs a reader is waiting for, ahead of other jobs.
+
+        Pending jobs move to the front; finished or failed jobs are re-queued
+        (a reader missed their translation); running jobs are left alone.
+
+        Returns:
+            Number of jobs submitted
+        """
+        now = time.time()
+        rows = [(doc_id, lang, now, now) for doc_id, lang in jobs]
+        if not rows:
+            return 0
+        with connect(self._db_path) as conn:
+            conn.executemany(
+                """INSERT INTO translation_jobs (doc_id, lang, enqueued_at, updated_at, requested)
+                   VALUES (?, ?, ?, ?, 1)
+                   ON CONFLICT (doc_id, lang) DO UPDATE SET
+                       requested = 1,
+                       status = 'pending',
+                       attempts = CASE WHEN status = 'pending' THEN attempts ELSE 0 END,
+                       error = CASE WHEN status = 'pending' THEN error ELSE NULL END,
+                       updated_at = excluded.updated_at
+                   WHERE status != 'running'""",
+                rows,
+            )
+        return len(rows)
+
+    def claim(self, limit: int = 1) -> List[Tuple[str, str]]:
+        """Atomically take up to limit pending jobs, requested ones first, then oldest first."""
+        with connect(self._db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                """SELECT doc_id, lang FROM translation_jobs
+                   WHERE status = 'pending' ORDER BY requested DESC, enqueued_at LIMIT ?""",
+                (limit,),
+            ).fetchall()
+            jobs = [(row["doc_id"], row["lang"]) for row in rows]
+            conn.executemany(
+                """UPDATE translation_jobs
+                   SET status = 'running', attempts = attempts + 1, updated_at = ?
+                   WHERE doc_id = ? AND lang = ?""",
+                [(time.time(), doc_id, lang) for doc_id, lang in jobs],
+            )
+        return jobs
+
+    def complete(self, jobs: Iterable[Tuple[str, str]]):
+        """Mark jobs as done."""
+        with connect(self._db_path) as conn:
+            conn.executemany(
+                """UPDATE translation_jobs SET status = 'done', error = NULL, requested = 0, updated_at = ?
+                   WHERE doc_id = ? AND lang = ?""",
+                [(time.time(), doc_id, lang) for doc_id, lang in jobs],
+            )
+
+    def fail(self, jobs: Iterable[Tuple[str, str]], error: str):
+        """Put jobs back in the queue, or mark them failed after max_attempts."""
+        with connect(self._db_path) as conn:
+            conn.executemany(
+                """UPDATE translation_jobs
+                   SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       error = ?, updated_at = ?
+                   WHERE doc_id = ? AND lang = ?""",
+                [(self.max_attempts, error[:500], time.time(), doc_id, lang) for doc_id, lang in jobs],
+            )
+
+    def delete(self, doc_id: str):
+        """Drop all jobs of a document."""
+        with connect(self._db_path) as conn:
+            conn.execute("DELETE FROM translation_jobs WHERE doc_id = ?", (doc_id,))
+
+    def requeue_running(self) -> int:
+        """Return jobs left 'running' by a crashed process to the queue."""
+        with connect(self._db_path) as conn:
+            cursor = conn.execute(
+                "UPDATE translation_jobs SET status = 'pending' WHERE status = 'running'"
+            )
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of jobs per status."""
+        with connect(self._db_path) as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM translation_jobs GROUP BY status"
+            ).fetchall()
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+class TranslationWorker:
+    """Thread pool that drains a TranslationQueue under a jobs-per-minute limit.
+
+    Args:
+        rag: RAGService used to fetch and translate documents
+        queue: Job queue to drain
+        workers: Number of worker threads
+        jobs_per_minute: Global rate limit across all workers
+        batch_size: Jobs claimed (and translated together) per iteration
+        poll_interval: Seconds to sleep when the queue is empty
+    """
+
+    def __init__(
+        self,
+        rag,
+        queue: TranslationQueue,
+        workers: int = 2,
+        jobs_per_minute: float = 30,
+        batch_size: int = 5,
+        poll_interval: float = 5.0,
+    ):
+        self._rag = rag
+        self._queue = queue
+        self._workers = workers
+        self._interval = 60.0 / jobs_per_minute if jobs_per_minute > 0 else 0.0
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        # Rate limiting: next time a job may start, shared by all workers
+        self._rate_lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+        self._metrics_lock = threading.Lock()
+        self._processed = 0
+        self._failed = 0
+        self._started_at: Optional[float] = None
+
+    def _wait_for_slots(self, n: int):
+        """Block until n jobs may start under the rate limit."""
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self._interval * n
+        delay = start - time.monotonic()
+        if delay > 0:
+            self._stop.wait(delay)
+
+    def process_once(self) -> int:
+        """Claim and translate one batch of jobs.
+
+        Returns:
+            Number of jobs processed (0 if the queue was empty)
+        """
+        jobs = self._queue.claim(self._batch_size)
+        if not jobs:
+            return 0
+
+        self._wait_for_slots(len(jobs))
+        try:
+            by_lang: Dict[str, List[str]] = {}
+            for doc_id, lang in jobs:
+                by_lang.setdefault(lang, []).append(doc_id)
+            for lang, doc_ids in by_lang.items():
+                items = self._rag.get_documents(doc_ids)
+                if items:
+                    # Failures raise, so the jobs are retried instead of completed
+                    self._rag.batch_ensure_translations(items, lang, Priority.BACKGROUND, raise_errors=True)
+        except Exception as e:
+            print(f"Translation pre-warm failed: {e}")
+            self._queue.fail(jobs, str(e))
+            with self._metrics_lock:
+                self._failed += len(jobs)
+            return len(jobs)
+
+        self._queue.complete(jobs)
+        with self._metrics_lock:
+            self._processed += len(jobs)
+        return len(jobs)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.process_once():
+                self._stop.wait(self._poll_interval)
+
+    def start(self):
+        """Start the worker threads (re-queueing jobs interrupted by a restart)."""
+        if self._threads:
+            return
+        requeued = self._queue.requeue_running()
+        if requeued:
+            print(f"Re-queued {requeued} interrupted translation jobs.")
+        self._stop.clear()
+        self._started_at = time.monotonic()
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._run, name=f"translation-prewarm-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Signal workers to stop and wait for the current batch to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self) -> int:
+        """Process jobs in the calling thread until the queue is empty.
+
+        Returns:
+            Number of jobs processed
+        """
+        total = 0
+        while True:
+            n = self.process_once()
+            if not n:
+                return total
+            total += n
+            print(f"Processed {total} jobs, backlog: {self._queue.stats()['pending']}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get progress metrics (backlog is in the queue's stats())."""
+        with self._metrics_lock:
+            processed, failed = self._processed, self._failed
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "running": bool(self._threads),
+            "workers": self._workers,
+            "processed": processed,
+            "failed": failed,
+            "jobs_per_minute": processed / elapsed * 60 if elapsed else 0.0,
+        }
+
+
+# Singleton instance
+_translation_worker: Optional[TranslationWorker] = None
+
+
+def get_translation_worker() -> TranslationWorker:
+    """Get the pre-warm worker singleton (not started)."""
+    global _translation_worker
+    if _translation_worker is None:
+        from app.config import get_settings
+        from app.services.rag import get_rag_service
+
+        settings = get_settings()
+        rag = get_rag_service()
+        _translation_worker = TranslationWorker(
+            rag,
+            rag.translation_queue,
+            workers=settings.prewarm_workers,
+            jobs_per_minute=settings.prewarm_jobs_per_minute,
+            batch_size=settings.prewarm_batch_size,
+        )
+    return _translation_worker
@@ -0,0 +1,117 @@
+"""Persistent store for cached document translations.
+
+Translations used to live in Chroma metadata (content_zh/content_en/...),
+which made every query drag up to three copies of each article back. They
+are now kept in the application database, compressed, keyed by
+(doc_id, lang) and tagged with a hash of the source title and content so a
+changed source invalidates its translations.
+"""
+import hashlib
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.db import connect
+
+
+def content_hash(title: str, content: str) -> str:
+    """Hash the source title and content a translation was made from."""
+    return hashlib.sha1(f"{title}\x00{content}".encode("utf-8")).hexdigest()[:16]
+
+
+def _pack(text: str) -> bytes:
+    return zlib.compress((text or "").encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class TranslationStore:
+    """Compressed translations keyed by (doc_id, lang) in SQLite."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        with connect(self._db_path) as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS translations (
+                    doc_id TEXT NOT NULL,
+                    lang TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    title BLOB NOT NULL,
+                    content BLOB NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (doc_id, lang)
+                )"""
+            )
+
+    def get(self, doc_id: str, lang: str, source_hash: str) -> Optional[Dict[str, str]]:
+        """Get a translation, or None if missing or made from other source content."""
+        return self.get_many([(doc_id, source_hash)], lang).get(doc_id)
+
+    def get_many(self, docs: Iterable[Tuple[str, str]], lang: str) -> Dict[str, Dict[str, str]]:
+        """Get up-to-date translations for (doc_id, source_hash) pairs.
+
+        Returns:
+            Dict mapping doc_id to {"title", "content"} for fresh entries only
+        """
+        wanted = dict(docs)
+        if not wanted:
+            return {}
+
+        found = {}
+        ids = list(wanted)
+        with connect(self._db_path) as conn:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"""SELECT doc_id, content_hash, title, content FROM translations
+                        WHERE lang = ? AND doc_id IN ({placeholders})""",
+                    [lang, *chunk],
+                ).fetchall()
+                for row in rows:
+                    if row["content_hash"] == wanted[row["doc_id"]]:
+                        found[row["doc_id"]] = {
+                            "title": _unpack(row["title"]),
+                            "content": _unpack(row["content"]),
+                        }
+        return found
+
+    def put(self, doc_id: str, lang: str, source_hash: str, title: str, content: str):
+        """Store (or replace) a translation."""
+        with connect(self._db_path) as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO translations
+                   (doc_id, lang, content_hash, title, content, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (doc_id, lang, source_hash, _pack(title), _pack(content), time.time()),
+            )
+
+    def delete(self, doc_id: str):
+        """Drop all translations of a document."""
+        with connect(self._db_path) as conn:
+            conn.execute("DELETE FROM translations WHERE doc_id = ?", (doc_id,))
+
+    def clear(self, lang: Optional[str] = None) -> int:
+        """Drop all translations (optionally only one language).
+
+        Returns:
+            Number of translations removed
+        """
+        with connect(self._db_path) as conn:
+            if lang:
+                cursor = conn.execute("DELETE FROM translations WHERE lang = ?", (lang,))
+            else:
+                cursor = conn.execute("DELETE FROM translations")
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of stored translations per language."""
+        with connect(self._db_path) as conn:
+            rows = conn.execute(
+                "SELECT lang, COUNT(*) AS n FROM translations GROUP BY lang"
+            ).fetchall()
+        return {row["lang"]: row["n"] for row in rows}
@@ -0,0 +1,38 @@
+"""Script to queue translations for the existing corpus and optionally drain the queue."""
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.rag import get_rag_service
+from app.services.translation_queue import get_translation_worker
+
+
+def main():
+    """Queue (doc_id, lang) jobs for every document."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--langs", default="", help="Comma-separated languages (default: PREWARM_LANGUAGES)")
+    parser.add_argument("--drain", action="store_true", help="Translate queued jobs now instead of leaving them to the server")
+    parser.add_argument("--status", action="store_true", help="Only print the queue status")
+    args = parser.parse_args()
+
+    rag = get_rag_service()
+    queue = rag.translation_queue
+
+    if not args.status:
+        languages = [lang.strip() for lang in args.langs.split(",") if lang.strip()] or None
+        queued = rag.enqueue_all_translations(languages)
+        print(f"Queued {queued} translation jobs.")
+
+    if args.drain:
+        processed = get_translation_worker().drain()
+        print(f"Processed {processed} jobs.")
+
+    for status, count in queue.stats().items():
+        print(f"  {status}: {count}")
+
+
+if __name__ == "__main__":
+    main()
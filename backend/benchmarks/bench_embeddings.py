@@ -0,0 +1,48 @@
+"""Benchmark embedding throughput of the configured provider.
+
+Usage:
+    python benchmarks/bench_embeddings.py [--rounds 3] [--repeat 20] [--batch-size 64]
+
+The corpus is every item in knowledge_base/*.json, repeated --repeat times.
+EMBEDDING_* environment variables select the provider, model and threads.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add backend directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import get_settings
+from app.services.embeddings import benchmark_embedder, create_embedder
+
+
+def load_texts() -> list:
+    """Load document contents from the bundled knowledge base."""
+    texts = []
+    for json_file in sorted(get_settings().knowledge_base_dir.glob("*.json")):
+        with open(json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        texts.extend(item["content"] for item in data.get("items", []) if item.get("content"))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20, help="Times to repeat the corpus")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    embedder = create_embedder()
+    if args.batch_size:
+        embedder.batch_size = args.batch_size
+
+    texts = load_texts() * args.repeat
+    result = benchmark_embedder(embedder, texts, rounds=args.rounds)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
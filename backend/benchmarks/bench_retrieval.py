@@ -0,0 +1,232 @@
+"""Benchmark ingest, search, browse and category counts on synthetic corpora.
+
+Usage:
+    python benchmarks/bench_retrieval.py [--sizes 1k,10k] [--queries 200]
+        [--out data/bench/results.json] [--baseline benchmarks/baseline.json]
+        [--tolerance 0.25] [--update-baseline]
+
+For each size a corpus is generated (see corpus.py) and loaded into a fresh
+Chroma directory and SQLite database under --work-dir, using the
+configured embedder (EMBEDDING_* settings) and retrieval options. The
+search cache and translation pre-warming are disabled so every call
+reaches the store.
+
+Results are written to --out. With --baseline, every latency (*_ms) that
+grew and every throughput (*_per_second) that fell by more than
+--tolerance is reported and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add backend directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import CATEGORIES, generate_corpus, parse_size, sample_queries
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarise latencies in seconds as millisecond percentiles."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """Run fn repeat times and return each duration in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def fresh_rag_service(work_dir: Path):
+    """Point settings at work_dir and build a new RAGService there."""
+    os.environ["CHROMA_PERSIST_DIRECTORY"] = str(work_dir / "chroma")
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'app.db'}"
+    os.environ["SEARCH_CACHE_SIZE"] = "0"
+    os.environ["TRANSLATION_PREWARM"] = "false"
+
+    from app.config import get_settings
+    import app.services.rag as rag_module
+
+    get_settings.cache_clear()
+    rag_module._rag_service = None
+    return rag_module.get_rag_service()
+
+
+def bench_size(size: int, work_dir: Path, query_count: int, seed: int) -> Dict[str, Any]:
+    """Run every benchmark against a corpus of size documents."""
+    from app.services.knowledge_loader import KnowledgeLoader
+
+    if work_dir.exists():
+        shutil.rmtree(work_dir)
+    files = generate_corpus(size, work_dir / "corpus", seed=seed)
+
+    rag = fresh_rag_service(work_dir)
+    rag.warm_up()
+    loader = KnowledgeLoader()
+
+    # Ingest
+    start = time.perf_counter()
+    loaded = sum(loader.load_from_json(path) for path in files)
+    ingest_seconds = time.perf_counter() - start
+    stored = rag.get_stats()["total_documents"]
+
+    # Search, unfiltered and with pushed-down filters
+    queries = sample_queries(query_count, seed=seed)
+    search = {}
+    for name, kwargs in {
+        "unfiltered": lambda q: {},
+        "category": lambda q: {"category": q["category"]},
+        "category_tier": lambda q: {"category": q["category"], "tier": q["tier"]},
+    }.items():
+        durations = []
+        for query in queries:
+            start = time.perf_counter()
+            rag.search(query["q"], n_results=5, **kwargs(query))
+            durations.append(time.perf_counter() - start)
+        search[name] = percentiles(durations)
+
+    # Browse at increasing depth, all documents and one category
+    page_size = 20
+    repeat = 10
+    browse = {}
+    for name, category in {"all": None, "category": next(iter(CATEGORIES))}.items():
+        total = rag.browse(category=category, page=1, page_size=1)["total"]
+        last_page = max(1, -(-total // page_size))
+        pages = sorted({page for page in (1, 10, 100, 1000, 10000) if page < last_page} | {last_page})
+        browse[name] = {
+            f"page_{page}": percentiles(timed(
+                lambda: rag.browse(category=category, page=page, page_size=page_size), repeat
+            ))
+            for page in pages
+        }
+
+    counts = percentiles(timed(rag.get_category_counts, 100))
+
+    return {
+        "documents": stored,
+        "ingest": {
+            "items": loaded,
+            "seconds": ingest_seconds,
+            "docs_per_second": loaded / ingest_seconds if ingest_seconds else 0.0,
+        },
+        "search": search,
+        "browse": browse,
+        "category_counts": counts,
+    }
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested results into dotted keys."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List metrics that regressed by more than tolerance against baseline.
+
+    Latencies (*_ms) regress upwards, throughputs (*_per_second) downwards;
+    other numbers are informational.
+    """
+    now = flatten(current["sizes"])
+    before = flatten(baseline.get("sizes", {}))
+    regressions = []
+    for key, old in sorted(before.items()):
+        new = now.get(key)
+        if new is None or not old:
+            continue
+        if key.endswith("_ms") and new > old * (1 + tolerance):
+            regressions.append(f"{key}: {old:.2f} -> {new:.2f} ms (+{(new / old - 1) * 100:.0f}%)")
+        elif key.endswith("_per_second") and new < old * (1 - tolerance):
+            regressions.append(f"{key}: {old:.1f} -> {new:.1f} /s ({(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k", help="Comma-separated corpus sizes, e.g. 1k,10k,100k,1m")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per search variant")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", type=Path, default=Path("data/bench"))
+    parser.add_argument("--out", type=Path, default=Path("data/bench/results.json"))
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to --baseline")
+    args = parser.parse_args()
+
+    from app.config import get_settings
+
+    settings = get_settings()
+    results: Dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {
+            "embedding_provider": settings.embedding_provider,
+            "embedding_model": settings.embedding_model,
+            "hybrid_search": settings.hybrid_search,
+            "chunking_enabled": settings.chunking_enabled,
+            "rerank_enabled": settings.rerank_enabled,
+            "mmr_enabled": settings.mmr_enabled,
+        },
+        "sizes": {},
+    }
+
+    for label in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        print(f"Benchmarking {label} documents...")
+        results["sizes"][label] = bench_size(
+            parse_size(label), args.work_dir / label, args.queries, args.seed
+        )
+        print(json.dumps(results["sizes"][label], indent=2))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline and args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(args.out, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+    elif args.baseline and args.baseline.exists():
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
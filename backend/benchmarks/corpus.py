@@ -0,0 +1,169 @@
+"""Generate synthetic bilingual health corpora shaped like knowledge_base/*.json.
+
+Usage:
+    python benchmarks/corpus.py --size 10k --out data/bench/corpus_10k [--seed 0]
+
+Documents are spread over the knowledge base categories, with files of at
+most --items-per-file items each ("sleep_0000.json", ...). Titles and
+bodies mix Chinese and English sentences built from per-category
+vocabularies, so lexical and vector search behave roughly like on real
+content. The same size and seed always produce the same corpus.
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+CATEGORIES: Dict[str, Dict[str, List[str]]] = {
+    "heart_rate": {
+        "zh": ["静息心率", "最大心率", "心率区间", "心动过速", "心动过缓", "有氧训练", "心脏健康"],
+        "en": ["resting heart rate", "maximum heart rate", "heart rate zones", "tachycardia", "bradycardia", "cardio fitness"],
+    },
+    "hrv": {
+        "zh": ["心率变异性", "自主神经", "副交感神经", "恢复状态", "呼吸训练", "晨起测量"],
+        "en": ["heart rate variability", "RMSSD", "autonomic balance", "vagal tone", "recovery score", "breathing exercise"],
+    },
+    "sleep": {
+        "zh": ["睡眠时长", "深度睡眠", "快速眼动睡眠", "睡眠周期", "失眠", "昼夜节律", "睡眠卫生"],
+        "en": ["sleep duration", "deep sleep", "REM sleep", "sleep cycles", "insomnia", "circadian rhythm", "sleep hygiene"],
+    },
+    "exercise": {
+        "zh": ["每周运动量", "中等强度", "力量训练", "步数", "久坐", "运动恢复", "拉伸"],
+        "en": ["weekly activity", "moderate intensity", "strength training", "daily steps", "sedentary time", "VO2 max"],
+    },
+    "stress": {
+        "zh": ["压力管理", "皮质醇", "正念冥想", "焦虑", "放松技巧", "情绪调节"],
+        "en": ["stress management", "cortisol", "mindfulness", "anxiety", "relaxation techniques", "burnout"],
+    },
+}
+
+SOURCES = [
+    ("World Health Organization (WHO)", "https://www.who.int/", 1),
+    ("American Heart Association (AHA)", "https://www.heart.org/", 1),
+    ("National Sleep Foundation", "https://www.sleepfoundation.org/", 1),
+    ("Mayo Clinic", "https://www.mayoclinic.org/", 2),
+    ("Cleveland Clinic", "https://my.clevelandclinic.org/", 2),
+    ("Journal of Applied Physiology", "https://journals.physiology.org/", 3),
+    ("Sports Medicine", "https://link.springer.com/journal/40279", 3),
+    ("Healthline", "https://www.healthline.com/", 4),
+]
+
+ZH_TEMPLATES = [
+    "研究表明，{a}与{b}密切相关，建议成年人每周关注{n}次。",
+    "根据指南，{a}的正常范围约为{n}到{m}，超出范围应咨询医生。",
+    "{a}会受到{b}的影响，保持规律作息有助于改善。",
+    "对于{a}，专家建议循序渐进，每次持续{n}分钟左右。",
+    "长期观察发现，{a}下降可能提示{b}不足。",
+]
+
+EN_TEMPLATES = [
+    "Studies link {a} with {b} in adults aged {n} to {m}.",
+    "Guidelines recommend monitoring {a} at least {n} times per week.",
+    "Improving {b} often changes {a} within {n} weeks.",
+    "A typical range for {a} is {n}-{m}, depending on age and fitness.",
+    "Consult a clinician if {a} stays outside the usual range for {n} days.",
+]
+
+
+def _sentence(rng: random.Random, terms: Dict[str, List[str]], lang: str) -> str:
+    templates = ZH_TEMPLATES if lang == "zh" else EN_TEMPLATES
+    a, b = rng.sample(terms[lang], 2)
+    n = rng.randint(2, 60)
+    return rng.choice(templates).format(a=a, b=b, n=n, m=n + rng.randint(5, 40))
+
+
+def generate_item(rng: random.Random, category: str, index: int) -> Dict[str, object]:
+    """Generate one knowledge item of category."""
+    terms = CATEGORIES[category]
+    lang = "zh" if rng.random() < 0.7 else "en"
+    source, url, tier = rng.choice(SOURCES)
+
+    joiner = "" if lang == "zh" else " "
+    paragraphs = [
+        joiner.join(_sentence(rng, terms, lang) for _ in range(rng.randint(2, 6)))
+        for _ in range(rng.randint(1, 4))
+    ]
+    # A bullet list like the curated items
+    bullets = "\n".join(f"- {_sentence(rng, terms, lang)}" for _ in range(rng.randint(0, 4)))
+    content = "\n\n".join(paragraphs + ([bullets] if bullets else []))
+
+    topic = rng.choice(terms[lang])
+    title = f"{topic} - {source.split(' (')[0]} #{index}" if lang == "en" else f"{topic}指南 #{index}"
+    return {
+        "title": title,
+        "content": content,
+        "source": source,
+        "source_url": f"{url}article/{category}/{index}",
+        "tier": tier,
+    }
+
+
+def generate_corpus(size: int, out_dir: Path, seed: int = 0, items_per_file: int = 1000) -> List[Path]:
+    """Write a corpus of size items to out_dir.
+
+    Returns:
+        Paths of the written JSON files
+    """
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    categories = list(CATEGORIES)
+
+    # Round-robin over categories keeps their sizes within one of each other
+    per_category = {category: size // len(categories) for category in categories}
+    for category in categories[: size % len(categories)]:
+        per_category[category] += 1
+
+    paths = []
+    for category in categories:
+        total = per_category[category]
+        for file_index, start in enumerate(range(0, total, items_per_file)):
+            items = [
+                generate_item(rng, category, index)
+                for index in range(start, min(start + items_per_file, total))
+            ]
+            path = out_dir / f"{category}_{file_index:04d}.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"category": category, "items": items}, f, ensure_ascii=False)
+            paths.append(path)
+    return paths
+
+
+def sample_queries(count: int, seed: int = 0) -> List[Dict[str, object]]:
+    """Generate search queries with the category and tier they are most likely filtered by."""
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(count):
+        category = rng.choice(list(CATEGORIES))
+        terms = CATEGORIES[category]
+        lang = "zh" if rng.random() < 0.7 else "en"
+        q = rng.choice(terms[lang])
+        if rng.random() < 0.5:
+            q = f"如何改善{q}" if lang == "zh" else f"how to improve {q}"
+        queries.append({"q": q, "category": category, "tier": rng.choice(SOURCES)[2]})
+    return queries
+
+
+def parse_size(value: str) -> int:
+    """Parse sizes like "1000", "10k" or "1m"."""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=parse_size, required=True, help="Number of documents, e.g. 10k")
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--items-per-file", type=int, default=1000)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.size, args.out, seed=args.seed, items_per_file=args.items_per_file)
+    print(f"Wrote {args.size} items in {len(paths)} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
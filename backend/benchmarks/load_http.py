@@ -0,0 +1,335 @@
+"""Open-loop HTTP load generator for the API.
+
+Usage:
+    python benchmarks/load_http.py [--target inprocess|http://127.0.0.1:8000]
+        [--mix chat=1,search=4,browse=3,categories=2] [--rate 20]
+        [--warmup 10] [--duration 60] [--stub-llm] [--out data/bench/load.json]
+
+Requests arrive as a Poisson process at --rate per second whether or not
+earlier ones have finished, so a saturated server shows up as growing
+latency instead of a silently lower request rate. Latency is measured
+from each request's scheduled arrival time. Warm-up requests are sent but
+not recorded.
+
+"inprocess" drives app.main:app through httpx's ASGI transport (running
+its lifespan), so no server is needed. --stub-llm sets LLM_PROVIDER=stub
+for the in-process app; start a remote server with LLM_PROVIDER=stub to
+get the same offline behaviour there.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List
+
+# Add backend directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import sample_queries
+
+PERCENTILES = (50, 75, 90, 95, 99, 99.9)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram in the style of HdrHistogram.
+
+    Bucket boundaries grow geometrically, so every recorded value is kept
+    to within `precision` relative error from lowest to highest in constant
+    memory, and percentiles can be read off exactly at that precision.
+
+    Args:
+        lowest: Smallest distinguishable value in seconds
+        precision: Relative bucket width (0.01 = 1%)
+    """
+
+    def __init__(self, lowest: float = 1e-5, precision: float = 0.01):
+        self.lowest = lowest
+        self._log_base = math.log1p(precision)
+        self._counts: Counter = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return int(math.log(value / self.lowest) / self._log_base) + 1
+
+    def _upper(self, bucket: int) -> float:
+        return self.lowest * math.exp(bucket * self._log_base)
+
+    def record(self, value: float):
+        self._counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add other's recordings (same lowest and precision) to this histogram."""
+        self._counts.update(other._counts)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Value at or below which q percent of recordings fall (bucket upper bound)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                return min(self._upper(bucket), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, max and standard percentiles in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            **{f"p{q:g}_ms": self.percentile(q) * 1000 for q in PERCENTILES},
+            "max_ms": self.max * 1000,
+        }
+
+    def distribution(self) -> List[List[float]]:
+        """[upper bound ms, cumulative fraction] per non-empty bucket, for plotting."""
+        points = []
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            points.append([round(min(self._upper(bucket), self.max) * 1000, 3), seen / self.count])
+        return points
+
+
+class EndpointStats:
+    """Latency histogram and outcome counts of one endpoint."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.outcomes: Counter = Counter()
+
+    def record(self, latency: float, outcome: str):
+        self.histogram.record(latency)
+        self.outcomes[outcome] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        ok = self.outcomes.get("200", 0)
+        return {
+            **self.histogram.summary(),
+            "throughput_per_second": self.histogram.count / elapsed if elapsed else 0.0,
+            "ok": ok,
+            "errors": {outcome: n for outcome, n in self.outcomes.items() if outcome != "200"},
+            "distribution": self.histogram.distribution(),
+        }
+
+
+class RequestFactory:
+    """Builds the request for each endpoint of the mix."""
+
+    ENDPOINTS = ("chat", "search", "browse", "categories")
+
+    def __init__(self, seed: int = 0, lang: str = "zh"):
+        self._random = random.Random(seed)
+        self._queries = sample_queries(500, seed=seed)
+        self.lang = lang
+
+    def build(self, endpoint: str) -> Dict[str, Any]:
+        query = self._random.choice(self._queries)
+        if endpoint == "chat":
+            return {"method": "POST", "url": "/api/chat/send", "json": {"message": query["q"]}}
+        if endpoint == "search":
+            return {"method": "GET", "url": "/api/knowledge/search", "params": {"q": query["q"], "limit": 10, "lang": self.lang}}
+        if endpoint == "browse":
+            params = {"page": self._random.randint(1, 10), "page_size": 20, "lang": self.lang}
+            if self._random.random() < 0.5:
+                params["category"] = query["category"]
+            return {"method": "GET", "url": "/api/knowledge/browse", "params": params}
+        if endpoint == "categories":
+            return {"method": "GET", "url": "/api/knowledge/categories"}
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "chat=1,search=4" into normalised weights."""
+    weights = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in RequestFactory.ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError("Mix needs at least one positive weight")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+@asynccontextmanager
+async def open_client(target: str, timeout: float) -> AsyncIterator[Any]:
+    """httpx client for a base URL, or for the in-process app with its lifespan running."""
+    import httpx
+
+    if target != "inprocess":
+        async with httpx.AsyncClient(base_url=target, timeout=timeout) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://inprocess", timeout=timeout) as client:
+            yield client
+
+
+class LoadGenerator:
+    """Sends an open-loop request mix and records per-endpoint latencies.
+
+    Args:
+        client: httpx.AsyncClient
+        mix: Endpoint weights summing to 1
+        rate: Mean arrivals per second
+        max_in_flight: Arrivals beyond this many outstanding requests are
+            counted as "dropped" instead of sent, so an overloaded target
+            cannot exhaust the driver's memory
+        seed: Seed for arrivals, mix choice and request parameters
+    """
+
+    def __init__(self, client, mix: Dict[str, float], rate: float, max_in_flight: int = 1000, seed: int = 0):
+        self.client = client
+        self.mix = mix
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self._random = random.Random(seed)
+        self._factory = RequestFactory(seed=seed)
+        self._in_flight = 0
+        self.stats: Dict[str, EndpointStats] = {}
+
+    async def _send(self, endpoint: str, scheduled: float, record: bool):
+        request = self._factory.build(endpoint)
+        try:
+            response = await self.client.request(**request)
+            outcome = str(response.status_code)
+        except Exception as e:
+            outcome = type(e).__name__
+        finally:
+            self._in_flight -= 1
+        if record:
+            self.stats.setdefault(endpoint, EndpointStats()).record(time.perf_counter() - scheduled, outcome)
+
+    async def run_phase(self, duration: float, record: bool) -> float:
+        """Send arrivals for duration seconds and wait for them to finish.
+
+        Returns:
+            Seconds from the first arrival until the last response
+        """
+        endpoints = list(self.mix)
+        weights = [self.mix[name] for name in endpoints]
+        tasks = []
+        start = time.perf_counter()
+        next_arrival = start
+        while True:
+            next_arrival += self._random.expovariate(self.rate)
+            if next_arrival - start >= duration:
+                break
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            endpoint = self._random.choices(endpoints, weights)[0]
+            if self._in_flight >= self.max_in_flight:
+                if record:
+                    self.stats.setdefault(endpoint, EndpointStats()).outcomes["dropped"] += 1
+                continue
+            self._in_flight += 1
+            tasks.append(asyncio.create_task(self._send(endpoint, next_arrival, record)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+
+async def run(args) -> Dict[str, Any]:
+    async with open_client(args.target, args.timeout) as client:
+        generator = LoadGenerator(client, args.mix, args.rate, args.max_in_flight, args.seed)
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup:.0f}s at {args.rate:g} req/s...")
+            await generator.run_phase(args.warmup, record=False)
+        print(f"Measuring for {args.duration:.0f}s at {args.rate:g} req/s...")
+        elapsed = await generator.run_phase(args.duration, record=True)
+
+    overall = LatencyHistogram()
+    for stats in generator.stats.values():
+        overall.merge(stats.histogram)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "target": args.target,
+        "stub_llm": args.stub_llm,
+        "rate": args.rate,
+        "mix": args.mix,
+        "warmup_seconds": args.warmup,
+        "elapsed_seconds": elapsed,
+        "overall": {
+            **overall.summary(),
+            "throughput_per_second": overall.count / elapsed if elapsed else 0.0,
+        },
+        "endpoints": {name: stats.summary(elapsed) for name, stats in sorted(generator.stats.items())},
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Print a per-endpoint latency table."""
+    header = f"{'endpoint':<12}{'count':>8}{'rps':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'max':>9}  errors"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("overall", {**report["overall"], "errors": {}})]
+    for name, s in rows:
+        errors = ", ".join(f"{k}={v}" for k, v in sorted(s["errors"].items())) or "-"
+        print(
+            f"{name:<12}{s['count']:>8}{s['throughput_per_second']:>8.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p90_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['p99.9_ms']:>9.1f}{s['max_ms']:>9.1f}  {errors}"
+        )
+    print("(latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="inprocess", help='"inprocess" or a base URL such as http://127.0.0.1:8000')
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("chat=1,search=4,browse=3,categories=2"))
+    parser.add_argument("--rate", type=float, default=20.0, help="Mean requests per second")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Seconds of unrecorded traffic first")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of recorded traffic")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stub-llm", action="store_true", help="Use the local stub LLM provider (in-process only)")
+    parser.add_argument("--out", type=Path, default=None, help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    if args.stub_llm:
+        if args.target != "inprocess":
+            print("Note: --stub-llm only affects the in-process app; start the server with LLM_PROVIDER=stub.")
+        os.environ["LLM_PROVIDER"] = "stub"
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
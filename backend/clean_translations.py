@@ -1,26 +1,14 @@
+"""Script to clear all cached translations so they are regenerated on demand."""
+import sys
+from pathlib import Path
 
-import chromadb
-from chromadb.config import Settings
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
 
-client = chromadb.PersistentClient(path="./data/chroma")
-collection = client.get_collection("health_knowledge")
+from app.services.translations import TranslationStore
 
-# Get all documents
-results = collection.get(include=["metadatas"])
-
-print(f"Total documents to clean: {len(results['ids'])}")
-
-for i, doc_id in enumerate(results["ids"]):
-    metadata = results["metadatas"][i]
-    if not metadata:
-        continue
-        
-    # Force clean all translation cache fields
-    metadata["title_zh"] = ""
-    metadata["content_zh"] = ""
-    metadata["title_en"] = ""
-    metadata["content_en"] = ""
-    
-    collection.update(ids=[doc_id], metadatas=[metadata])
+store = TranslationStore()
+removed = store.clear()
 
+print(f"Removed {removed} cached translations.")
 print("Full database translation cleanup complete.")
@@ -0,0 +1,22 @@
+"""Script to move translations cached in Chroma metadata into the translation store."""
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.rag import get_rag_service
+
+
+def main():
+    """Migrate legacy title_*/content_* metadata fields."""
+    rag = get_rag_service()
+    stats = rag.get_stats()
+    print(f"Migrating translations of {stats['total_documents']} documents...")
+    
+    moved = rag.migrate_legacy_translations()
+    print(f"Moved {moved} translations. Store now holds: {rag.get_stats()['translations']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Script to re-split all documents into passage chunks (after changing CHUNK_SIZE etc.)."""
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.rag import get_rag_service
+
+
+def main():
+    """Rebuild the passage chunk collection from the document collection."""
+    rag = get_rag_service()
+    stats = rag.get_stats()
+    print(f"Re-chunking {stats['total_documents']} documents...")
+    
+    count = rag.rebuild_chunks()
+    print(f"Wrote {count} chunks.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Script to rebuild the category/tier document counters from ChromaDB."""
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.rag import get_rag_service
+
+
+def main():
+    """Recount every document per category and tier."""
+    rag = get_rag_service()
+    
+    total = rag.rebuild_counters()
+    print(f"Counted {total} documents:")
+    for category, count in sorted(rag.get_category_counts().items()):
+        print(f"  {category}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from app.services.context_packer import ContextPacker, allocate_budget
+
+
+def test_zero_weight_does_not_exceed_budget():
+    allocation = allocate_budget([0.3, 0.0], [5000, 5000], 3000)
+    assert sum(allocation) <= 3000
+    assert allocation[0] > allocation[1]
+
+
+def test_all_zero_weights_split_evenly():
+    assert allocate_budget([0.0, 0.0], [5000, 5000], 3000) == [1500, 1500]
+
+
+def test_mixed_weights_are_proportional():
+    allocation = allocate_budget([0.6, 0.3, 0.1], [5000, 5000, 5000], 3000)
+    assert sum(allocation) <= 3000
+    assert allocation[0] > allocation[1] > allocation[2] > 0
+
+
+def test_unused_share_of_short_document_is_redistributed():
+    allocation = allocate_budget([0.5, 0.5], [100, 5000], 3000)
+    assert allocation == [100, 2900]
+
+
+def test_negative_weight_counts_as_zero():
+    assert allocate_budget([-0.4, 0.0], [5000, 5000], 3000) == [1500, 1500]
+
+
+def test_pack_keeps_relevant_document_within_budget():
+    relevant = "Adults need seven to nine hours of sleep each night. " * 150
+    off_topic = "Tomatoes grow best in warm soil with plenty of sun. " * 150
+    docs = [
+        {"content": relevant, "relevance_score": 0.3, "metadata": {"tier": 1}},
+        {"content": off_topic, "relevance_score": -0.2, "metadata": {"tier": 1}},
+    ]
+    packer = ContextPacker(token_budget=3000)
+    packed = packer.pack("how many hours of sleep do adults need", docs)
+
+    assert packed["tokens"] <= 3000
+    assert packed["documents"][0]["content"].startswith("Adults need")
+    kept = {doc["content"][:6] for doc in packed["documents"]}
+    assert "Adults" in kept
@@ -0,0 +1,57 @@
+import pytest
+
+from app.services.embeddings import Embedder, EmbeddingMismatchError, check_collection_embedding
+
+
+class _FakeEmbedder(Embedder):
+    name = "fake"
+
+    def __init__(self, dimension: int, model: str = "fake-model"):
+        super().__init__()
+        self._size = dimension
+        self._model_id = model
+
+    @property
+    def model_id(self) -> str:
+        return self._model_id
+
+    def _embed_batch(self, texts):
+        return [[0.0] * self._size for _ in texts]
+
+
+class _FakeCollection:
+    name = "test"
+
+    def __init__(self, metadata=None, vectors=()):
+        self.metadata = metadata
+        self.vectors = list(vectors)
+
+    def count(self):
+        return len(self.vectors)
+
+    def get(self, limit=None, include=()):
+        return {"embeddings": self.vectors[:limit]}
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+
+def test_new_collection_records_model_and_dimension():
+    collection = _FakeCollection({"description": "x"})
+    check_collection_embedding(collection, _FakeEmbedder(4))
+    assert collection.metadata == {"description": "x", "embedding_model": "fake-model", "embedding_dimension": 4}
+
+
+def test_other_model_is_refused():
+    collection = _FakeCollection({"embedding_model": "old-model", "embedding_dimension": 4}, [[0.0] * 4])
+    with pytest.raises(EmbeddingMismatchError):
+        check_collection_embedding(collection, _FakeEmbedder(4))
+
+
+def test_unrecorded_collection_is_checked_by_vector_size():
+    with pytest.raises(EmbeddingMismatchError):
+        check_collection_embedding(_FakeCollection(None, [[0.0] * 384]), _FakeEmbedder(768))
+
+    collection = _FakeCollection(None, [[0.0] * 4])
+    check_collection_embedding(collection, _FakeEmbedder(4))
+    assert collection.metadata["embedding_model"] == "fake-model"
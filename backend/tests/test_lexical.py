@@ -0,0 +1,9 @@
+from app.services.lexical import normalize_rrf, reciprocal_rank_fusion
+
+
+def test_normalize_rrf_scales_to_unit_interval():
+    fused = dict(reciprocal_rank_fusion([["a", "b"], ["a", "c"]], k=60))
+    assert normalize_rrf(fused["a"], 2, k=60) == 1.0
+    # Second in one list only
+    assert normalize_rrf(fused["c"], 2, k=60) < 0.5
+    assert normalize_rrf(fused["c"], 2, k=60) > 0.0
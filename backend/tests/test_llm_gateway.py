@@ -0,0 +1,50 @@
+import threading
+import time
+
+from app.services.llm_gateway import LLMGateway, Priority
+from app.services.llm_providers import StubProvider
+
+
+def _gateway(**kwargs) -> LLMGateway:
+    provider = StubProvider(latency_ms=0, latency_sigma=0, tokens_per_second=0, output_tokens=5)
+    return LLMGateway(provider, ["stub-model"], tokens_per_minute=0, **kwargs)
+
+
+def test_interactive_call_is_not_held_behind_background_refill_timer():
+    # 1 request/s; background calls must leave half a minute's budget (30 requests)
+    gateway = _gateway(requests_per_minute=60, interactive_rate_share=0.5)
+    gateway._requests._level = 0.0
+
+    # The background call arms a ~31s refill timer before the interactive call arrives
+    background = threading.Thread(
+        target=gateway.generate, args=("background",), kwargs={"priority": Priority.BACKGROUND}, daemon=True
+    )
+    background.start()
+    time.sleep(0.1)
+
+    start = time.monotonic()
+    gateway.generate("interactive", priority=Priority.INTERACTIVE)
+    elapsed = time.monotonic() - start
+
+    # About one second of refill, not the background waiter's 31s
+    assert elapsed < 3.0
+    assert background.is_alive()
+
+
+def test_later_timer_does_not_delay_pending_earlier_one():
+    gateway = _gateway(requests_per_minute=60, interactive_rate_share=0.5)
+    gateway._requests._level = 0.0
+
+    start = time.monotonic()
+    interactive = threading.Thread(
+        target=gateway.generate, args=("interactive",), kwargs={"priority": Priority.INTERACTIVE}
+    )
+    interactive.start()
+    time.sleep(0.1)
+    threading.Thread(
+        target=gateway.generate, args=("background",), kwargs={"priority": Priority.BACKGROUND}, daemon=True
+    ).start()
+
+    interactive.join(timeout=5)
+    assert not interactive.is_alive()
+    assert time.monotonic() - start < 3.0
@@ -0,0 +1,13 @@
+from app.services.profiling import RequestProfiler
+
+
+def test_wanted_matches_token(tmp_path):
+    profiler = RequestProfiler(tmp_path, token="secret")
+    assert profiler.wanted("secret")
+    assert not profiler.wanted("other")
+    assert not profiler.wanted(None)
+
+
+def test_wanted_rejects_non_ascii_header(tmp_path):
+    profiler = RequestProfiler(tmp_path, token="secret")
+    assert not profiler.wanted("é")
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+from app.services.rag_async import AsyncRAGService  # noqa: E402
+
+
+class _SlowRAG:
+    """Stands in for RAGService; search blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def search(self, *args):
+        self.release.wait(5)
+        return []
+
+
+def test_cancelled_queued_calls_are_not_counted_as_queued():
+    async def scenario():
+        rag = _SlowRAG()
+        service = AsyncRAGService(rag, max_workers=1, max_queue=10)
+        try:
+            running = asyncio.ensure_future(service.asearch("running"))
+            await asyncio.sleep(0.05)
+            queued = [asyncio.ensure_future(service.asearch(f"queued {i}")) for i in range(3)]
+            await asyncio.sleep(0.05)
+            assert service.stats()["queued"] == 3
+
+            for task in queued:
+                task.cancel()
+            await asyncio.gather(*queued, return_exceptions=True)
+            assert service.stats()["queued"] == 0
+
+            rag.release.set()
+            await running
+            stats = service.stats()
+            assert (stats["queued"], stats["running"], stats["completed"]) == (0, 0, 1)
+        finally:
+            rag.release.set()
+            service.shutdown()
+
+    asyncio.run(scenario())
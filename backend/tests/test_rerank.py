@@ -0,0 +1,48 @@
+from app.services.rerank import CrossEncoderReranker, result_score
+
+
+class _FakeCrossEncoder:
+    """Scores a passage by how often it mentions "sleep"."""
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        return [passage.count("sleep") * 4.0 - 2.0 for _, passage in pairs]
+
+
+def _reranker(budget_ms: float = 1000.0) -> CrossEncoderReranker:
+    reranker = CrossEncoderReranker("fake", batch_size=2, budget_ms=budget_ms)
+    reranker._model = _FakeCrossEncoder()
+    return reranker
+
+
+def _results():
+    # Vector order disagrees with the passages' actual relevance
+    return [
+        {"id": "a", "content": "diet", "relevance_score": 0.9},
+        {"id": "b", "content": "sleep sleep", "relevance_score": 0.4},
+        {"id": "c", "content": "sleep", "relevance_score": 0.3},
+    ]
+
+
+def test_confidence_score_follows_rerank_order():
+    results, complete = _reranker().rerank("sleep", _results())
+
+    assert complete
+    assert [r["id"] for r in results] == ["b", "c", "a"]
+    scores = [result_score(r) for r in results]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] > 0.7 > scores[-1]
+    assert all(r["rerank_complete"] for r in results)
+
+
+def test_partial_rerank_is_flagged():
+    results, complete = _reranker(budget_ms=0).rerank("sleep", _results())
+
+    assert not complete
+    assert all(not r["rerank_complete"] for r in results)
+    # Unscored results fall back to their retrieval score
+    assert result_score(results[0]) == 0.9
+
+
+def test_result_score_without_rerank_uses_relevance():
+    assert result_score({"relevance_score": 0.42}) == 0.42
+    assert result_score({}) == 0.0
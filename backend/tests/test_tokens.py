@@ -0,0 +1,12 @@
+from app.services.tokens import detect_language, estimate_tokens
+
+
+def test_estimate_tokens_counts_cjk_characters_individually():
+    assert estimate_tokens("睡眠") == 2
+    assert estimate_tokens("sleep") == 2
+
+
+def test_detect_language():
+    assert detect_language("成年人每晚需要 7-9 小时睡眠（WHO 建议）。") == "zh"
+    assert detect_language("Adults need 7-9 hours of sleep (睡眠) per night.") == "en"
+    assert detect_language("") == "en"
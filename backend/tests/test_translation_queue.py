@@ -0,0 +1,39 @@
+from app.services.translation_queue import TranslationQueue
+
+
+def test_requested_jobs_are_claimed_first(tmp_path):
+    queue = TranslationQueue(tmp_path / "app.db")
+    queue.enqueue([("a", "en"), ("b", "en")])
+    queue.request([("c", "en")])
+
+    assert queue.claim(1) == [("c", "en")]
+    assert queue.claim(2) == [("a", "en"), ("b", "en")]
+
+
+def test_request_moves_pending_job_ahead(tmp_path):
+    queue = TranslationQueue(tmp_path / "app.db")
+    queue.enqueue([("a", "en"), ("b", "en")])
+    queue.request([("b", "en")])
+
+    assert queue.claim(1) == [("b", "en")]
+
+
+def test_request_requeues_failed_job(tmp_path):
+    queue = TranslationQueue(tmp_path / "app.db", max_attempts=1)
+    queue.enqueue([("a", "en")])
+    queue.fail(queue.claim(1), "LLM unavailable")
+    assert queue.stats()["failed"] == 1
+
+    queue.request([("a", "en")])
+    assert queue.stats()["pending"] == 1
+    assert queue.claim(1) == [("a", "en")]
+
+
+def test_request_leaves_running_job_alone(tmp_path):
+    queue = TranslationQueue(tmp_path / "app.db")
+    queue.enqueue([("a", "en")])
+    queue.claim(1)
+    queue.request([("a", "en")])
+
+    assert queue.stats()["running"] == 1
+    assert queue.claim(1) == []
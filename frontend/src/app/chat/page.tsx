@@ -7,6 +7,7 @@ import { useTranslation } from "@/lib/i18n"; // Import i18n hook
 export default function ChatPage() {
   const { t } = useTranslation();
   const [messages, setMessages] = useState<ChatMessage[]>([]);
+  const [conversationId, setConversationId] = useState<string | undefined>();
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
   const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
@@ -40,7 +41,9 @@ export default function ChatPage() {
     setLoading(true);
 
     try {
-      const response = await sendChatMessage(userMessage, undefined, newMessages);
+      // History is kept server-side under the conversation id
+      const response = await sendChatMessage(userMessage, conversationId);
+      setConversationId(response.conversation_id);
       
       setMessages([
         ...newMessages,
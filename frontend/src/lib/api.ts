@@ -57,6 +57,13 @@ export interface Suggestion {
   category: string;
 }
 
+// Log the backend's per-stage timings (Server-Timing header) in development
+function logServerTiming(label: string, res: Response) {
+  if (process.env.NODE_ENV !== 'development') return;
+  const timing = res.headers.get('Server-Timing');
+  if (timing) console.debug(`[server-timing] ${label}: ${timing}`);
+}
+
 // Knowledge API
 export async function getCategories(lang: string = "zh"): Promise<Category[]> {
   const params = new URLSearchParams({ lang });
@@ -70,6 +77,7 @@ export async function searchKnowledge(query: string, category?: string, lang: st
   if (category) params.append('category', category);
   
   const res = await fetch(`${API_BASE}/api/knowledge/search?${params}`);
+  logServerTiming('search', res);
   if (!res.ok) throw new Error('Failed to search');
   const data = await res.json();
   return data.results;
@@ -105,6 +113,7 @@ export async function browseKnowledge(
   if (tier) params.append('tier', tier.toString());
   
   const res = await fetch(`${API_BASE}/api/knowledge/browse?${params}`);
+  logServerTiming('browse', res);
   if (!res.ok) throw new Error('Failed to browse');
   const data: BrowseResponse = await res.json();
   
@@ -139,6 +148,7 @@ export async function sendChatMessage(
       history,
     }),
   });
+  logServerTiming('chat', res);
   if (!res.ok) throw new Error('Failed to send message');
   return res.json();
 }